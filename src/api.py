@@ -0,0 +1,241 @@
+# Standard library imports
+import hmac
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+# Related third party imports for data manipulation
+import numpy as np
+
+# Third-party imports for web application
+from flask import jsonify, request
+
+# Local application/library specific imports
+import artifacts
+import bpred as bd
+
+
+# -------------------------------------------------------------------------------------------------------
+# * JSON prediction API
+# * POST /api/v1/predict with one record or a list of records in the saved inputs file layout
+# * (AgeGroup, EnvironmentSatisfaction, ..., YearsSinceLastPromotion), e.g.
+# *   {"AgeGroup": "a_gro_ya", "EnvironmentSatisfaction": 1, ..., "YearsSinceLastPromotion": 0}
+# * concurrent single-record requests are coalesced into one predict_proba call by the MicroBatcher
+# * POST /api/v1/explain takes the same payload and returns per-field contributions (explain.py)
+# * GET /api/v1/model describes the loaded model; POST /api/v1/model/reload (Authorization: Bearer
+# * MODEL_ADMIN_TOKEN) loads the newest artifact in the background and swaps it in, see bpred.ModelRegistry
+
+max_batch_size = int(os.environ.get('PREDICT_MAX_BATCH_SIZE', 64))
+max_wait_ms = float(os.environ.get('PREDICT_MAX_WAIT_MS', 5))
+request_timeout_s = float(os.environ.get('PREDICT_TIMEOUT_S', 10))
+
+# * POST /api/v1/explain scores a few hundred rows per second, bulk reports get a longer limit
+explain_timeout_s = float(os.environ.get('EXPLAIN_TIMEOUT_S', 120))
+
+# * the reload endpoint is disabled (403) while MODEL_ADMIN_TOKEN is unset
+model_admin_token = os.environ.get('MODEL_ADMIN_TOKEN', '')
+
+
+class MicroBatcher:
+    # * collects rows from many threads and scores them together
+    # * a batch is flushed when it reaches max_batch_size or max_wait_ms after its first row arrived;
+    # * every row is scored by the model its caller submitted it with, one predict_fn call per model version
+    def __init__(self, predict_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.pid = None
+
+    def _ensure_worker(self):
+        # started on first use and restarted after a fork, threads do not survive os.fork()
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive() or self.pid != os.getpid():
+                self.pending = queue.Queue()
+                self.pid = os.getpid()
+                self.worker = threading.Thread(target=self._run, name='predict-microbatcher', daemon=True)
+                self.worker.start()
+
+    def submit(self, row, model):
+        # * row is one encoded universal_features vector, model the bd.LoadedModel to score it with;
+        # * the future resolves to its predict_proba row
+        self._ensure_worker()
+        future = Future()
+        self.pending.put((row, model, future))
+        return future
+
+    def _collect(self):
+        # blocks for the first row, then waits at most max_wait_ms for more
+        items = [self.pending.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            # a reload can land between two submits, rows of the old and new model are scored apart
+            by_version = {}
+            for row, model, future in self._collect():
+                by_version.setdefault(model.version, (model, []))[1].append((row, future))
+            for model, items in by_version.values():
+                rows = np.vstack([row for row, _ in items])
+                try:
+                    proba = self.predict_fn(rows, model)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                for i, (_, future) in enumerate(items):
+                    future.set_result(proba[i])
+
+
+def predict_on_executor(rows, model=None):
+    # every model call goes through bd.inference_executor, which bounds how many run at once
+    return bd.inference_executor.run(bd.predict_proba_matrix, rows, model)
+
+
+micro_batcher = MicroBatcher(predict_on_executor)
+
+
+def busy_response(message):
+    response = jsonify({'error': message})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def encode_records(records):
+    # * same encoder as the form and the batch upload; raises ValueError for missing fields or rows that cannot be encoded
+    x, valid, errors = bd.feature_encoder.encode(records)
+    if not valid.all():
+        details = {int(i): errors[i] for i in np.flatnonzero(~valid)}
+        raise ValueError(f'Invalid record(s): {details}')
+    return x
+
+
+def format_prediction(proba_row, model):
+    labels = bd.proba_to_labels(proba_row.reshape(1, -1), model)
+    prediction = {
+        'prediction': str(labels[0]),
+        'leave_probability': round(float(proba_row[model.leave_class_index]), 4),
+    }
+    calibrated = bd.calibrate(proba_row[model.leave_class_index], model)
+    if calibrated is not None:
+        prediction['calibrated_leave_probability'] = round(float(calibrated), 4)
+    return prediction
+
+
+def format_explanation(contributions, model):
+    # contributions add up to the leave probability, no second model call needed
+    leave = model.path_explainer.expected_value[model.leave_class_index] + contributions.sum()
+    return {
+        'leave_probability': round(float(leave), 4),
+        'contributions': {field: round(value, 4) for field, value in bd.field_contributions(contributions).items()},
+    }
+
+
+def register_routes(server):
+    @server.route('/api/v1/predict', methods=['POST'])
+    def predict():
+        payload = request.get_json(silent=True)
+        single = isinstance(payload, dict)
+        if not single and not (isinstance(payload, list) and payload and all(isinstance(r, dict) for r in payload)):
+            return jsonify({'error': 'Expected a JSON object or a non-empty list of objects.'}), 400
+
+        try:
+            x = encode_records([payload] if single else payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # the whole response comes from the model that was current when the request arrived
+        model = bd.model_registry.current
+        if single:
+            # single records go through the micro-batcher so concurrent callers share one model call
+            proba_row = bd.prediction_cache.get(x[0], model.version)
+            if proba_row is None:
+                try:
+                    proba_row = micro_batcher.submit(x[0], model).result(timeout=request_timeout_s)
+                except TimeoutError:
+                    return busy_response('Prediction timed out.')
+                except bd.InferenceBusy as e:
+                    return busy_response(str(e))
+                bd.prediction_cache.put(x[0], proba_row, model_version=model.version)
+            return jsonify(format_prediction(proba_row, model))
+
+        # a list is already a batch, score it in one call
+        try:
+            proba = predict_on_executor(x, model)
+        except (bd.InferenceBusy, bd.InferenceTimeout) as e:
+            return busy_response(str(e))
+        return jsonify({'predictions': [format_prediction(row, model) for row in proba]})
+
+    @server.route('/api/v1/explain', methods=['POST'])
+    def explain():
+        payload = request.get_json(silent=True)
+        single = isinstance(payload, dict)
+        if not single and not (isinstance(payload, list) and payload and all(isinstance(r, dict) for r in payload)):
+            return jsonify({'error': 'Expected a JSON object or a non-empty list of objects.'}), 400
+
+        try:
+            x = encode_records([payload] if single else payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        model = bd.model_registry.current
+        try:
+            if single:
+                contributions = bd.inference_executor.run(bd.explain_cached, x[0], model)[np.newaxis, :]
+            else:
+                contributions = bd.inference_executor.run(bd.explain_matrix, x, model, timeout=explain_timeout_s)
+        except (bd.InferenceBusy, bd.InferenceTimeout) as e:
+            return busy_response(str(e))
+        explanations = [format_explanation(row, model) for row in contributions]
+        body = {'expected_leave_probability': round(float(model.path_explainer.expected_value[model.leave_class_index]), 4)}
+        if single:
+            body.update(explanations[0])
+        else:
+            body['explanations'] = explanations
+        return jsonify(body)
+
+    @server.route('/api/v1/stats', methods=['GET'])
+    def stats():
+        return jsonify({
+            'model': bd.model_registry.stats(),
+            'prediction_cache': bd.prediction_cache.stats(),
+            'inference_executor': bd.inference_executor.stats(),
+        })
+
+    @server.route('/api/v1/model', methods=['GET'])
+    def model_info():
+        model = bd.model_registry.current
+        return jsonify({**bd.model_registry.stats(), 'metadata': model.metadata})
+
+    @server.route('/api/v1/model/reload', methods=['POST'])
+    def model_reload():
+        # * answers right away; the swap shows up in GET /api/v1/model once the new model is loaded and warmed.
+        # * Every gunicorn worker is its own process: this reloads the worker that got the request, the
+        # * others pick the artifact up with their watcher (MODEL_WATCH_INTERVAL_S)
+        supplied = request.headers.get('Authorization', '')
+        if not model_admin_token or not hmac.compare_digest(supplied, f'Bearer {model_admin_token}'):
+            return jsonify({'error': 'Forbidden.'}), 403
+        payload = request.get_json(silent=True) or {}
+        path = None
+        if payload.get('artifact'):
+            # an artifact directory name under models/, e.g. to roll back to an earlier model
+            path = os.path.join(artifacts.artifacts_root, os.path.basename(str(payload['artifact'])), 'model.joblib')
+            if artifacts.read_artifact(os.path.dirname(path)) is None:
+                return jsonify({'error': f'No artifact {payload["artifact"]!r}.'}), 404
+        if not bd.model_registry.reload_in_background(path):
+            return jsonify({'error': 'A reload is already running.'}), 409
+        return jsonify({'status': 'reloading', 'model_version': bd.model_registry.current.version}), 202
@@ -3,14 +3,25 @@ from dash import Dash, dcc, html, Input, Output, State, callback_context, no_upd
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 
-# Related third party imports for data manipulation
-import pandas as pd
+# Standard library imports
+import base64
+import io
+import math
 
 # Local application/library specific imports
 import validator as vd
 import bpred as bp
 import cpf
 import visuals as vs
+import render_cache
+import batch
+import api
+import history
+import health
+import ranking
+import importance
+import sweep
+import encoder
 import os
 
 # -------------------------------------------------------------------------------------------------------
@@ -20,6 +31,21 @@ app = Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[db
 app.title = "Employee Retention Prediction Model"
 server = app.server
 
+# content-addressed seaborn images (rendered by render_cache.py) are served from here
+render_cache.register_routes(server)
+
+# bulk scoring endpoint: POST /api/v1/batch-predict
+batch.register_routes(server)
+
+# json scoring endpoint for HR-system integrations: POST /api/v1/predict
+api.register_routes(server)
+
+# streaming export of the prediction history: GET /api/v1/history/<id>/export
+history.register_routes(server)
+
+# liveness and readiness probes: GET /healthz, GET /readyz (see gunicorn.conf.py)
+health.register_routes(server)
+
 app.layout = html.Div(
     children=[
         dcc.Store(id='kde_plot_selection_form_store'),
@@ -46,6 +72,8 @@ app.layout = html.Div(
             dcc.Tab(label='KDE Plot', value='tab-4'),
             dcc.Tab(label='Box Plot', value='tab-5'),
             dcc.Tab(label='AUROC Graph', value='tab-6'),
+            dcc.Tab(label='Risk Ranking', value='tab-8'),
+            dcc.Tab(label='Model Explainability', value='tab-9'),
         ]),
         html.Div(id='tabs-content')
     ]
@@ -80,11 +108,12 @@ def update_classnames(monthly_income, yat_com, totworks_years, ysl_promote):
     [
      # This output is used to display the prediction result
      Output("cpf_output", "value"),
-     # This output is used to update the data in the DataTable
-     Output("cpf_output_table", "data"),
-     # This output is used to trigger the download of the DataFrame as a CSV file
-     Output("download_dataframe_csv", "data"),
-     # Session declaration so it doesn't override to_csv_inputs and table_csv_inputs
+     # The inputs that moved the prediction most (bpred.explain_prediction)
+     Output("cpf_explanation", "children"),
+     # This output is used to trigger the download of the saved inputs (history.register_routes)
+     Output("history_export_frame", "src"),
+     # Session id and revision of the server-side prediction history (history.py),
+     # a new revision makes update_history_table reload the visible page
      Output('session_user_input', 'data')
     ],
     [
@@ -108,42 +137,212 @@ def update_classnames(monthly_income, yat_com, totworks_years, ysl_promote):
      State('yat_com_cpf', 'value'),
      State('totwork_years_cpf', 'value'),
      State('ysl_promote_cpf', 'value'),
+     State('save_format_cpf', 'value'),
      State('session_user_input', 'data')
     ]
 )
 
-def predict_or_save(n_clicks_submit, n_clicks_save, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm, session_data):
+def predict_or_save(n_clicks_submit, n_clicks_save, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm, save_format, session_data):
     ctx = callback_context
     if not ctx.triggered:
         raise PreventUpdate
     button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
-    if session_data is None:
-        session_data = {'to_csv_inputs': [], 'table_csv_inputs': []}
+    # the browser only holds the session id, the rows themselves stay in history.history_store
+    if session_data is None or 'session_id' not in session_data:
+        session_data = {'session_id': history.new_session_id()}
+    session_id = session_data['session_id']
 
     if button_id == "submit_button_id" and n_clicks_submit:
         # Check if any input is blank
         # if not all([m_inc, y_com, tw_yr, y_prm]):
-        #     return "ERROR: Missing input or wrong input.", no_update, no_update, session_data
+        #     return "ERROR: Missing input or wrong input.", no_update, session_data
 
         # this one have 3 return values, so I arranged them this way and they have to be this way. see the last return part on bpred for reference.
-        pred_output, pred_to_csv, gen_g_string = bp.make_prediction(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm)
-        # Store output for to csv / to save file
-        session_data['to_csv_inputs'].append([gen_g_string, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, ovr_t, m_inc, y_com, tw_yr, y_prm, pred_to_csv])
-        # Store output for the table / used for displaying the user inputs in table
-        session_data['table_csv_inputs'].append([gen_g_string, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, ovr_t, m_inc, y_com, tw_yr, y_prm, pred_to_csv])
-        # Convert each list in cpf.table_csv_inputs to a dictionary that is going to be used in showing user inputs
-        output_table_data = [dict(zip(cpf.table_csv_inputs_column_names, row)) for row in session_data['table_csv_inputs']]
-        return pred_output, output_table_data, no_update, session_data
+        # runs on the bounded inference pool, a busy or slow model gives an error instead of a stuck callback
+        try:
+            # the prediction and its explanation from the same model, even if a reload swaps it in between
+            model = bp.model_registry.current
+            pred_output, pred_to_csv, gen_g_string = bp.inference_executor.run(bp.make_prediction, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm, model=model)
+            factors = bp.inference_executor.run(bp.explain_prediction, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm, model=model)
+        except (bp.InferenceBusy, bp.InferenceTimeout, ValueError) as e:
+            return f'ERROR: {e}', None, no_update, session_data
+        # Store output for to csv / to save file and for the table
+        history.history_store.append(session_id, [gen_g_string, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, ovr_t, m_inc, y_com, tw_yr, y_prm, pred_to_csv])
+        session_data['revision'] = history.history_store.count(session_id)
+        return pred_output, cpf.explanation_list(factors), no_update, session_data
 
     elif button_id == "save_button_id" and n_clicks_save:
-        df_output_table_data = pd.DataFrame(session_data['table_csv_inputs'], columns=cpf.table_csv_inputs_column_names_save_file)
-        csv_string = df_output_table_data.to_csv(index=False, encoding='utf-8')
-        # Clear the inputs list
-        ses_to_csv = session_data['to_csv_inputs'] = []
-        ses_table_csv = session_data['table_csv_inputs'] = []
+        # the rows move to a one-off export id (so the table clears right away) and are streamed from there
+        export_id = history.history_store.detach(session_id)
+        session_data['revision'] = 0
+
+        return [], None, history.export_url(export_id, save_format or 'csv', clear=True), session_data
+
+# what-if sweep: one batched predict_proba call over the chosen input's range
+@app.callback(
+    [
+     Output('sweep_graph', 'figure'),
+     Output('sweep_graph', 'style'),
+     Output('sweep_status', 'children')
+    ],
+    [Input('sweep_button_id', 'n_clicks')],
+    [
+     State('sweep_field_cpf', 'value'),
+     State('env_satis_cpf', 'value'),
+     State('job_satis_cpf', 'value'),
+     State('rel_satis_cpf', 'value'),
+     State('perf_rating_cpf', 'value'),
+     State('wlbal_cpf', 'value'),
+     State('job_inv_cpf', 'value'),
+     State('job_lev_cpf', 'value'),
+     State('age_group_cpf', 'value'),
+     State('ot_cpf', 'value'),
+     State('monthly_income_cpf', 'value'),
+     State('yat_com_cpf', 'value'),
+     State('totwork_years_cpf', 'value'),
+     State('ysl_promote_cpf', 'value')
+    ]
+)
+def what_if_sweep(n_clicks, field, env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm):
+    if not n_clicks:
+        raise PreventUpdate
+    record = bp.form_record(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm)
+    try:
+        values, leave, calibrated = bp.inference_executor.run(sweep.sweep, record, field)
+    except (ValueError, bp.InferenceBusy, bp.InferenceTimeout) as e:
+        return no_update, {'display': 'none'}, f'ERROR: {e}'
+    fig = sweep.build_sweep_figure(field, values, leave, calibrated, current=encoder.to_float(record[field]))
+    return fig, {}, ''
+
+# the prediction history table, one page at a time with the table's own sorting and filtering
+@app.callback(
+    [
+     Output('cpf_output_table', 'data'),
+     Output('cpf_output_table', 'page_count')
+    ],
+    [
+     Input('cpf_output_table', 'page_current'),
+     Input('cpf_output_table', 'page_size'),
+     Input('cpf_output_table', 'sort_by'),
+     Input('cpf_output_table', 'filter_query'),
+     Input('session_user_input', 'data')
+    ]
+)
+def update_history_table(page_current, page_size, sort_by, filter_query, session_data):
+    if session_data is None or 'session_id' not in session_data:
+        return [], 0
+    page_current = page_current or 0
+    rows, total = history.history_store.query(
+        session_data['session_id'],
+        page_current * page_size,
+        page_size,
+        filters=history.parse_filter_query(filter_query),
+        sort_by=history.parse_sort_by(sort_by),
+    )
+    output_table_data = [dict(zip(cpf.table_csv_inputs_column_names, row)) for row in rows]
+    return output_table_data, max(1, math.ceil(total / page_size))
 
-        return ses_to_csv, ses_table_csv, dcc.send_string(csv_string, "saved_user_inputs.csv"), session_data
+# batch prediction from the upload box under the table, the scored file is sent back as a download
+@app.callback(
+    [
+     Output('download_batch_csv', 'data'),
+     Output('batch_upload_status', 'children')
+    ],
+    [Input('batch_upload', 'contents')],
+    [State('batch_upload', 'filename')]
+)
+def batch_predict_upload(contents, filename):
+    if contents is None:
+        raise PreventUpdate
+    content_string = contents.split(',', 1)[1]
+    decoded = base64.b64decode(content_string)
+    try:
+        csv_string = batch.score_csv(io.BytesIO(decoded))
+    except (ValueError, bp.InferenceBusy, bp.InferenceTimeout) as e:
+        return no_update, f'ERROR: {e}'
+    return dcc.send_string(csv_string, f'scored_{filename}'), f'Scored {filename}.'
+
+# risk ranking tab: an uploaded roster is scored once and replaces the dataset as the ranked table
+@app.callback(
+    [
+     Output('ranking_source', 'data'),
+     Output('ranking_status', 'children')
+    ],
+    [
+     Input('ranking_upload', 'contents'),
+     Input('ranking_use_dataset', 'n_clicks')
+    ],
+    [State('ranking_upload', 'filename')]
+)
+def select_ranking_source(contents, n_clicks, filename):
+    ctx = callback_context
+    if not ctx.triggered:
+        raise PreventUpdate
+    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    if button_id == 'ranking_use_dataset' or contents is None:
+        return None, 'Ranking the employees of the dataset.'
+    decoded = base64.b64decode(contents.split(',', 1)[1])
+    try:
+        key = bp.inference_executor.run(ranking.score_roster, decoded, timeout=120)
+    except (ValueError, bp.InferenceBusy, bp.InferenceTimeout) as e:
+        return no_update, f'ERROR: {e}'
+    return key, f'Ranking the employees of {filename}.'
+
+@app.callback(
+    [
+     Output('ranking_job_level', 'options'),
+     Output('ranking_overtime', 'options'),
+     Output('ranking_age_group', 'options')
+    ],
+    [Input('ranking_source', 'data')]
+)
+def update_ranking_filters(source):
+    table = ranking.score_table(source)
+    if table is None:
+        raise PreventUpdate
+    return [ranking.filter_options(table.options(column)) for column in ranking.filter_columns]
+
+@app.callback(
+    [
+     Output('ranking_table', 'data'),
+     Output('ranking_summary', 'children')
+    ],
+    [
+     Input('ranking_source', 'data'),
+     Input('ranking_job_level', 'value'),
+     Input('ranking_overtime', 'value'),
+     Input('ranking_age_group', 'value'),
+     Input('ranking_top_n', 'value')
+    ]
+)
+def update_ranking_table(source, job_level, overtime, age_group, top_n):
+    table = ranking.score_table(source)
+    if table is None:
+        return [], 'The uploaded roster is no longer available, please upload it again.'
+    filters = {'JobLevel': job_level, 'OverTime': overtime, 'AgeGroup': age_group}
+    n_matching = len(table.positions(filters))
+    top = table.top_n(int(top_n or ranking.default_top_n), filters)
+    return top.to_dict('records'), f'Top {len(top)} of {n_matching} matching employees.'
+
+# bar chart population filters: a slice of the precomputed count cube, no rows are regrouped
+@app.callback(
+    [Output(f'bar_graph_{spec["name"]}', 'figure') for spec in vs.bar_chart_specs] +
+    [Output('bar_filter_status', 'children')],
+    [
+     Input('bar_filter_department', 'value'),
+     Input('bar_filter_job_role', 'value'),
+     Input('bar_filter_gender', 'value')
+    ],
+    prevent_initial_call=True
+)
+def filter_bar_charts(department, job_role, gender):
+    population, figures = vs.filtered_bar_figures({'Department': department, 'JobRole': job_role, 'Gender': gender})
+    if population == 0:
+        status = 'No employees match the selected filters.'
+    else:
+        status = f'{population} employees' if not (department or job_role or gender) else f'{population} matching employees'
+    return figures + [status]
 
 # needed for tab 3 to render the different plot types
 @app.callback(
@@ -154,43 +353,29 @@ def update_store(value):
     return value
 
 #tabs
+# each tab loads its figures from the figure cache the first time it is opened
 @app.callback(
     Output('tabs-content', 'children'),
     [Input('tabs', 'value'),
-     Input('kde_plot_selection_form_store', 'data')],
-    [State('session_user_input', 'data')]
+     Input('kde_plot_selection_form_store', 'data')]
 )
-def render_content(tab, plot_type, session_data):
+def render_content(tab, plot_type):
     if tab == 'tab-1':
-        if session_data is not None:
-            session_data['to_csv_inputs'] = []
-            session_data['table_csv_inputs'] = []
-        return dbc.Container([vs.bar_plot_selection_form])
+        return dbc.Container([vs.bar_plot_selection_form()])
     elif tab == 'tab-2':
-        if session_data is not None:
-            session_data['to_csv_inputs'] = []
-            session_data['table_csv_inputs'] = []
-        return dbc.Container([vs.corr_heatmap_container])
+        return dbc.Container([vs.corr_heatmap_container()])
     elif tab == 'tab-3':
-        if session_data is not None:
-            session_data['to_csv_inputs'] = []
-            session_data['table_csv_inputs'] = []
-        return dbc.Container([vs.cfm_container])
+        return dbc.Container([vs.cfm_container()])
     elif tab == 'tab-4':
-        if session_data is not None:
-            session_data['to_csv_inputs'] = []
-            session_data['table_csv_inputs'] = []
-        return dbc.Container([vs.kde_plot_container])
+        return dbc.Container([vs.kde_plot_container()])
     elif tab == 'tab-5':
-        if session_data is not None:
-            session_data['to_csv_inputs'] = []
-            session_data['table_csv_inputs'] = []
-        return dbc.Container([vs.box_plot_container])
+        return dbc.Container([vs.box_plot_container()])
     elif tab == 'tab-6':
-        if session_data is not None:
-            session_data['to_csv_inputs'] = []
-            session_data['table_csv_inputs'] = []
-        return dbc.Container([vs.auroc_container])
+        return dbc.Container([vs.auroc_container()])
+    elif tab == 'tab-8':
+        return dbc.Container([ranking.ranking_container()])
+    elif tab == 'tab-9':
+        return dbc.Container([importance.importance_container()])
     elif tab == 'tab-7':
         return dbc.Container([
             html.Hr(),
@@ -316,5 +501,7 @@ def yrs_prm_disable(yrs_prm_dis, yrs_prm):
 #     app.run(debug=True)
 
 if __name__ == "__main__":
+    health.start_warm_up()
+    bp.model_registry.start_watching()
     port = int(os.environ.get("PORT", 8050))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,51 @@
+# Standard library imports
+import json
+import os
+
+
+# -------------------------------------------------------------------------------------------------------
+# * model artifacts
+# * the versioned directories train.py writes (models/rf-<utc timestamp>-<model sha256[:12]>/) and how
+# * bpred finds the newest one; kept apart from train.py so loading a model never imports the training code
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# * MODEL_ARTIFACTS_DIR moves the artifacts, e.g. onto a volume shared by every instance
+artifacts_root = os.environ.get('MODEL_ARTIFACTS_DIR', os.path.join(script_dir, 'models'))
+
+
+def read_artifact(path):
+    # * (metrics, schema) of a complete artifact directory, None for anything else
+    try:
+        with open(os.path.join(path, 'metrics.json'), encoding='utf-8') as f:
+            metrics = json.load(f)
+        with open(os.path.join(path, 'schema.json'), encoding='utf-8') as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(os.path.join(path, 'model.joblib')):
+        return None
+    return metrics, schema
+
+
+def newest_artifact(features, target, root=artifacts_root):
+    # * model.joblib path of the most recent artifact trained on exactly these features and target, or None
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return None
+    candidates = []
+    for name in names:
+        if not name.startswith('rf-'):
+            continue
+        path = os.path.join(root, name)
+        artifact = read_artifact(path)
+        if artifact is None:
+            continue
+        metrics, schema = artifact
+        if schema.get('features') != list(features) or schema.get('target') != target:
+            continue
+        candidates.append((metrics.get('created_at', ''), name, path))
+    if not candidates:
+        return None
+    return os.path.join(max(candidates)[2], 'model.joblib')
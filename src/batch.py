@@ -0,0 +1,131 @@
+# Standard library imports
+import io
+
+# Related third party imports for data manipulation
+import numpy as np
+import pandas as pd
+
+# Third-party imports for web application
+from flask import Response, jsonify, request, stream_with_context
+
+# Local application/library specific imports
+import api
+import bpred as bd
+import cpf
+
+
+# -------------------------------------------------------------------------------------------------------
+# * batch prediction
+# * scores a whole csv in the saved inputs file layout (cpf.table_csv_inputs_column_names_save_file),
+# * one predict_proba call per chunk instead of one make_prediction call per row, each one on
+# * bd.inference_executor like the REST predictions, so a large upload cannot take every core
+
+batch_chunksize = 10000
+
+# * OUTPUT is optional on upload, it is (re)written with the prediction
+input_columns = cpf.table_csv_inputs_column_names_save_file[:-1]
+
+output_columns = input_columns + ['OUTPUT', 'LeaveProbability', 'CalibratedLeaveProbability', 'ERROR']
+
+
+def check_columns(columns):
+    # * raises ValueError naming the missing columns, the whole file is rejected in that case
+    bd.feature_encoder.check_fields(columns)
+
+
+def encode_chunk(chunk):
+    # * vectorized encoding of a chunk of raw string rows into the universal_features matrix
+    # * returns the matrix, a mask of rows that could be encoded and a per-row error message
+    return bd.feature_encoder.encode_columns(chunk)
+
+
+def score_chunk(chunk):
+    # * returns the chunk with OUTPUT, LeaveProbability, CalibratedLeaveProbability and ERROR filled in
+    # * raises bd.InferenceBusy / bd.InferenceTimeout when the executor cannot take or finish the chunk
+    x, valid, errors = encode_chunk(chunk)
+
+    output = np.full(len(chunk), 'INVALID', dtype=object)
+    leave_probability = np.full(len(chunk), np.nan)
+    calibrated_leave_probability = np.full(len(chunk), np.nan)
+    if valid.any():
+        # one model for the whole chunk, even if a reload swaps it meanwhile
+        model = bd.model_registry.current
+        proba = bd.inference_executor.run(bd.predict_proba_matrix, x[valid], model)
+        output[valid] = bd.proba_to_labels(proba, model)
+        leave_probability[valid] = proba[:, model.leave_class_index]
+        if model.calibration is not None:
+            calibrated_leave_probability[valid] = bd.calibrate(proba[:, model.leave_class_index], model)
+
+    scored = chunk[input_columns].copy()
+    scored['OUTPUT'] = output
+    scored['LeaveProbability'] = np.round(leave_probability, 4)
+    scored['CalibratedLeaveProbability'] = np.round(calibrated_leave_probability, 4)
+    scored['ERROR'] = errors
+    return scored
+
+
+def read_chunks(source, chunksize=batch_chunksize):
+    # * checks the header before anything is scored so a wrong file fails fast
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunksize, encoding='utf-8-sig')
+    try:
+        first = next(reader)
+    except StopIteration:
+        raise ValueError('The file has no rows.')
+    check_columns(first.columns)
+
+    def chunks():
+        yield first
+        yield from reader
+    return chunks()
+
+
+def unscored_chunk(chunk, message):
+    # * the chunk with every row marked as not scored, message in ERROR
+    scored = chunk[input_columns].copy()
+    scored['OUTPUT'] = 'INVALID'
+    scored['LeaveProbability'] = np.nan
+    scored['CalibratedLeaveProbability'] = np.nan
+    scored['ERROR'] = message
+    return scored
+
+
+def score_csv_stream(source, chunksize=batch_chunksize):
+    # * generator of csv text, header first, then one block per scored chunk
+    # * the first chunk is scored before anything is returned, so a busy executor fails the whole request
+    # * (InferenceBusy / InferenceTimeout); a later chunk that cannot be scored keeps its rows with the error
+    chunks = read_chunks(source, chunksize)
+    first = score_chunk(next(chunks)).to_csv(index=False, header=True, columns=output_columns)
+
+    def generate():
+        yield first
+        for chunk in chunks:
+            try:
+                scored = score_chunk(chunk)
+            except (bd.InferenceBusy, bd.InferenceTimeout) as e:
+                scored = unscored_chunk(chunk, str(e))
+            yield scored.to_csv(index=False, header=False, columns=output_columns)
+    return generate()
+
+
+def score_csv(source, chunksize=batch_chunksize):
+    return ''.join(score_csv_stream(source, chunksize))
+
+
+def register_routes(server):
+    # * POST a csv (multipart field "file" or the raw body) and get the scored csv streamed back
+    @server.route('/api/v1/batch-predict', methods=['POST'])
+    def batch_predict():
+        upload = request.files.get('file')
+        source = upload.stream if upload is not None else io.BytesIO(request.get_data())
+        try:
+            csv_stream = score_csv_stream(source)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except (bd.InferenceBusy, bd.InferenceTimeout) as e:
+            return api.busy_response(str(e))
+
+        return Response(
+            stream_with_context(csv_stream),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=scored_employees.csv'},
+        )
@@ -1,7 +1,13 @@
 # Standard library imports
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Related third party imports for data manipulation
+import numpy as np
 import pandas as pd
 
 # Related third party imports for machine learning
@@ -10,6 +16,15 @@ from sklearn.model_selection import train_test_split
 # Related third party imports for model persistence
 import joblib
 
+# Local application/library specific imports
+import artifacts
+import dataset
+import encoder
+import forest
+import model_meta
+import model_store
+import prediction_cache as pc
+
 # * UNIVERSAL VARIABLE
 
 universal_features = [
@@ -33,14 +48,17 @@ universal_all_variable = [
 # -------------------------------------------------------------------------------------------------------
 # * for model accuracy test
 # Implementing Random Forest model
-df_bpred = pd.read_csv('https://raw.githubusercontent.com/CS-DREAM-TEAM/assets/main/ibm_hr_acc_test.csv')
+# Bundled processed table (data/ibm_hr_processed.feather), no network access needed
+df_bpred = dataset.load_processed()
 
 # Initializing inputs and targets
 bpred_inputs = df_bpred[universal_features]
 bpred_target = df_bpred[universal_target]
 
 # Implementing the ML Train Test Split Method
-x_train, x_test, y_train, y_test = train_test_split(bpred_inputs, bpred_target, train_size=0.8)
+# Fixed seed so the stored metadata always describes the same rows; the bundled forest was trained on
+# them, so they are not held out for it (no calibration, see model_meta.py), artifacts use their own holdout
+x_train, x_test, y_train, y_test = train_test_split(bpred_inputs, bpred_target, train_size=0.8, random_state=42)
 
 # -------------------------------------------------------------------------------------------------------
 # * the model itself
@@ -48,11 +66,318 @@ x_train, x_test, y_train, y_test = train_test_split(bpred_inputs, bpred_target,
 # Get the directory of the current script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Construct the path to the file using a relative path
-file_path = os.path.join(script_dir, 'rf_model_4.0.5_NOPARAM.joblib')
+# The bundled model, used until train.py has written an artifact
+bundled_model_path = os.path.join(script_dir, 'rf_model_4.0.5_NOPARAM.joblib')
+
+# Above this many rows sklearn's own (Cython) traversal is faster than the numpy one
+compiled_max_rows = 128
+
+
+def newest_model_path():
+    # * newest artifact under models/ trained on universal_features (see train.py), otherwise the bundled file
+    return artifacts.newest_artifact(universal_features, universal_target) or bundled_model_path
+
+
+class LoadedModel:
+    # * everything derived from one joblib file; never changed after construction, a new model is a new LoadedModel
+    def __init__(self, path):
+        self.path = path
+        # Content hash of the joblib file, names the model store and the metadata sidecar
+        self.sha256 = model_meta.file_sha256(path)
+        self._sklearn_model = None
+        self._sklearn_lock = threading.Lock()
+
+        # Flat-array copy of the forest, memory-mapped from cache/model_store/ so forked or separately
+        # started workers share the same pages; checked bit-identical to the sklearn model on the processed
+        # dataset before it is stored, see forest.py and model_store.py
+        self.compiled_forest = model_store.load_or_build_compiled(self.sha256, self.sklearn_model, lambda: bpred_inputs)
+
+        # Column of predict_proba that holds the probability of leaving (Attrition_Yes == 1)
+        self.leave_class_index = list(self.compiled_forest.classes_).index(1)
+
+        # Accuracy and per-class precision/recall, read from the sidecar next to the joblib file
+        # (scored once and written there if the sidecar is missing or belongs to another model)
+        self.metadata = model_meta.load_or_build_metadata(self.sklearn_model, path, lambda: (x_test, y_test),
+                                                          data_sha256=dataset.dataset_sha256())
+
+        # Identifies the loaded model in caches; a different joblib file gives a different version
+        self.version = self.metadata['model_sha256'][:12]
+
+        # Platt scaling fitted on the artifact's held-out rows when the sidecar was built
+        # (None for the bundled model, whose test rows are not held out)
+        self.calibration = self.metadata.get('calibration')
+
+        # Path-dependent TreeSHAP tables of the forest, memory-mapped from cache/model_store/ like compiled_forest, see explain.py
+        self.path_explainer = model_store.load_or_build_explainer(self.sha256, self.sklearn_model)
+
+    def sklearn_model(self):
+        # * the sklearn model itself, only unpickled when something needs it (large batches, build steps)
+        with self._sklearn_lock:
+            if self._sklearn_model is None:
+                self._sklearn_model = joblib.load(self.path)
+            return self._sklearn_model
+
+    def warm_up(self):
+        # * a few predictions and one explanation, so the first request after a swap pays for neither
+        x = x_test.to_numpy(dtype=np.float64)[:8]
+        self.compiled_forest.predict_proba(x)
+        self.path_explainer.contributions(x[:1], self.leave_class_index)
+
+
+# -------------------------------------------------------------------------------------------------------
+# * model registry
+# * model_registry.current is the LoadedModel every prediction uses; a reload builds and warms the new
+# * LoadedModel on the side and then replaces the reference in one assignment, so a request sees either
+# * the old model or the new one, never a mix. Functions below read model_registry.current once per call.
+# * A watcher thread (MODEL_WATCH_INTERVAL_S, 0 turns it off) picks up new train.py artifacts in every
+# * worker; api.py also exposes POST /api/v1/model/reload. Modules holding model-dependent caches
+# * register a callback with model_registry.on_swap.
+
+model_watch_interval_s = float(os.environ.get('MODEL_WATCH_INTERVAL_S', 30))
+
 
-# Load the file using the constructed path
-loaded_rf_model = joblib.load(file_path)
+class ModelRegistry:
+    def __init__(self, path):
+        self.current = LoadedModel(path)
+        self.listeners = []
+        self.reload_lock = threading.Lock()
+        self.state = {'reloading': False, 'swaps': 0, 'last_swap': None, 'last_error': None}
+        self.watched_path = path
+        self.watcher = None
+        self.watcher_pid = None
+
+    def on_swap(self, callback):
+        # * callback(loaded_model) runs after every swap, to drop caches built from the previous model
+        self.listeners.append(callback)
+        return callback
+
+    def swap(self, loaded):
+        self.current = loaded
+        self.state['swaps'] += 1
+        self.state['last_swap'] = time.time()
+        for callback in self.listeners:
+            try:
+                callback(loaded)
+            except Exception as e:
+                self.state['last_error'] = f'{getattr(callback, "__qualname__", callback)}: {e!r}'
+
+    def reload(self, path=None):
+        # * loads path (the newest model by default), warms it and swaps it in;
+        # * returns False when it is already the current model or another reload is running
+        if not self.reload_lock.acquire(blocking=False):
+            return False
+        self.state['reloading'] = True
+        try:
+            path = path or newest_model_path()
+            if model_meta.file_sha256(path) == self.current.sha256:
+                return False
+            loaded = LoadedModel(path)
+            loaded.warm_up()
+            self.state['last_error'] = None
+            self.swap(loaded)
+            return True
+        except Exception as e:
+            self.state['last_error'] = repr(e)
+            raise
+        finally:
+            self.state['reloading'] = False
+            self.reload_lock.release()
+
+    def reload_in_background(self, path=None):
+        # * starts reload on a thread and returns right away; False when a reload is already running
+        if self.state['reloading']:
+            return False
+        threading.Thread(target=self._reload_quietly, args=(path,), name='model-reload', daemon=True).start()
+        return True
+
+    def _reload_quietly(self, path):
+        try:
+            self.reload(path)
+        except Exception:
+            # kept in state['last_error'], the current model stays in place
+            pass
+
+    def start_watching(self, interval_s=model_watch_interval_s):
+        # * polls models/ for a newer artifact; one watcher per process, started again after a fork
+        if interval_s <= 0 or (self.watcher is not None and self.watcher.is_alive() and self.watcher_pid == os.getpid()):
+            return
+        self.watcher_pid = os.getpid()
+        self.watcher = threading.Thread(target=self._watch, args=(interval_s,), name='model-watcher', daemon=True)
+        self.watcher.start()
+
+    def _watch(self, interval_s):
+        while True:
+            time.sleep(interval_s)
+            path = newest_model_path()
+            # only a newly written artifact triggers a reload, a model chosen through the endpoint stays
+            if path != self.watched_path:
+                self.watched_path = path
+                self._reload_quietly(path)
+
+    def stats(self):
+        model = self.current
+        return {
+            'model_version': model.version,
+            'model_path': os.path.relpath(model.path, script_dir),
+            'model_created_at': model.metadata.get('created_at'),
+            **self.state,
+        }
+
+
+model_registry = ModelRegistry(newest_model_path())
+
+# Bounded LRU/TTL cache of single-row predictions, see prediction_cache.py
+prediction_cache = pc.create_cache(model_registry.current.version)
+
+# Per-feature contributions of single rows, keyed like prediction_cache (in-process only, they are cheap to recompute)
+explanation_cache = pc.PredictionCache(model_registry.current.version)
+
+
+@model_registry.on_swap
+def reset_model_caches(loaded):
+    prediction_cache.set_model_version(loaded.version)
+    explanation_cache.set_model_version(loaded.version)
+
+
+def load_rf_model():
+    # * the sklearn model of the current LoadedModel
+    return model_registry.current.sklearn_model()
+
+# bd.compiled_forest, bd.model_version, ... read through to the current model
+current_model_attributes = {
+    'file_path': 'path',
+    'model_sha256': 'sha256',
+    'compiled_forest': 'compiled_forest',
+    'leave_class_index': 'leave_class_index',
+    'model_metadata': 'metadata',
+    'model_version': 'version',
+    'calibration': 'calibration',
+    'path_explainer': 'path_explainer',
+}
+
+def __getattr__(name):
+    # bd.loaded_rf_model keeps working for the build steps (visuals, forest), loaded on first use
+    if name == 'loaded_rf_model':
+        return load_rf_model()
+    if name in current_model_attributes:
+        return getattr(model_registry.current, current_model_attributes[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# -------------------------------------------------------------------------------------------------------
+# * inference executor
+# * model calls from the Dash callbacks and the REST endpoints run on a small shared thread pool;
+# * at most INFERENCE_WORKERS calls run and INFERENCE_MAX_QUEUE wait, anything beyond that is refused
+# * right away (InferenceBusy) and a caller waits at most INFERENCE_TIMEOUT_S (InferenceTimeout),
+# * so a burst or one slow call cannot pile requests up behind it
+
+inference_workers = int(os.environ.get('INFERENCE_WORKERS', 4))
+inference_max_queue = int(os.environ.get('INFERENCE_MAX_QUEUE', 64))
+inference_timeout_s = float(os.environ.get('INFERENCE_TIMEOUT_S', 10))
+
+
+class InferenceBusy(RuntimeError):
+    pass
+
+
+class InferenceTimeout(TimeoutError):
+    pass
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers=inference_workers, max_queue=inference_max_queue, timeout_s=inference_timeout_s):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pid = None
+        self.latencies = deque(maxlen=1000)
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.in_flight = 0
+        self.running = 0
+        self.peak_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.latencies.clear()
+
+    def _ensure_pool(self):
+        # created on first use and again after a fork, the pool's threads do not survive os.fork()
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+                self.slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+                self.pid = os.getpid()
+                self._reset_counters()
+
+    def submit(self, fn, *args, **kwargs):
+        # * returns a Future, raises InferenceBusy when every worker is busy and the queue is full
+        self._ensure_pool()
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise InferenceBusy('Too many predictions in progress, try again shortly.')
+        submitted_at = time.perf_counter()
+        with self.lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.in_flight - self.running)
+
+        def task():
+            with self.lock:
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        def done(_):
+            self.slots.release()
+            with self.lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.latencies.append(time.perf_counter() - submitted_at)
+
+        future = self.pool.submit(task)
+        future.add_done_callback(done)
+        return future
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        # * fn(*args, **kwargs) on the pool, waiting at most timeout (default timeout_s) seconds
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout_s if timeout is None else timeout)
+        except FutureTimeoutError:
+            # a call that has not started yet is dropped, a running one finishes in the background
+            future.cancel()
+            with self.lock:
+                self.timed_out += 1
+            raise InferenceTimeout('Prediction timed out.')
+
+    def stats(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000.0
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'timeout_s': self.timeout_s,
+                'running': self.running,
+                'queue_depth': self.in_flight - self.running,
+                'peak_queue_depth': self.peak_queue_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'latency_p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+                'latency_p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+            }
+
+
+inference_executor = InferenceExecutor()
 
 
 age_mapping = {
@@ -61,36 +386,141 @@ age_mapping = {
     'a_gro_ret'     : [0,0]
 }
 
-def make_prediction(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm):
+# Convert Generation Group code to full name, this is also what the saved inputs file holds
+orig_name_gg_mapping = {'a_gro_ya'      : 'Young Adult (18-30)',
+                        'a_gro_a'       : 'Adult (30-60)',
+                        'a_gro_ret'     : 'Near Retirement (60+)' }
+
+# * saved inputs file / API field -> model feature
+numeric_feature_map = {
+    'EnvironmentSatisfaction'   : 'EnvironmentSatisfaction',
+    'JobSatisfaction'           : 'JobSatisfaction',
+    'RelationshipSatisfaction'  : 'RelationshipSatisfaction',
+    'PerformanceRating'         : 'PerformanceRating',
+    'WorkLifeBalance'           : 'WorkLifeBalance',
+    'JobInvolvement'            : 'JobInvolvement',
+    'JobLevel'                  : 'JobLevel',
+    'OverTime'                  : 'OverTime_Yes',
+    'MonthlyIncome'             : 'MonthlyIncome',
+    'YearsAtCompany'            : 'YearsAtCompany',
+    'TotalWorkingYears'         : 'TotalWorkingYears',
+    'YearsSinceLastPromotion'   : 'YearsSinceLastPromotion',
+}
+
+# * AgeGroup accepts the form codes (a_gro_ya) as well as the names a saved file holds
+age_group_lookup = dict(age_mapping)
+age_group_lookup.update({name: age_mapping[code] for code, name in orig_name_gg_mapping.items()})
+
+# Shared by the form, the JSON API and the batch upload, see encoder.py
+feature_encoder = encoder.FeatureEncoder(universal_features, numeric_feature_map, 'AgeGroup',
+                                         ['Age_group_Young_Adults', 'Age_group_Adults'], age_group_lookup)
+
+def predict_proba_matrix(x, model=None):
+    # * predict_proba for rows that are already encoded in universal_features order
+    # * (used by the batch and api paths, which score many rows per call)
+    model = model or model_registry.current
+    if len(x) <= compiled_max_rows:
+        return model.compiled_forest.predict_proba(x)
+    return model.sklearn_model().predict_proba(pd.DataFrame(x, columns=universal_features))
+
+def proba_to_labels(proba, model=None):
+    # * STAY / LEAVE per row, picking the most probable class like the sklearn model's predict does
+    model = model or model_registry.current
+    predicted = model.compiled_forest.classes_.take(proba.argmax(axis=1))
+    return np.where(predicted == 1, 'LEAVE', 'STAY')
+
+def calibrate(leave_proba, model=None):
+    # * calibrated leave probability (scalar or array), None when the model has no calibration map
+    model = model or model_registry.current
+    if model.calibration is None:
+        return None
+    return model_meta.apply_calibration(model.calibration, leave_proba)
+
+def predict_proba_cached(row, model=None):
+    # * predict_proba for one encoded row, served from prediction_cache when the same vector was seen before
+    model = model or model_registry.current
+    proba = prediction_cache.get(row, model.version)
+    if proba is None:
+        proba = model.compiled_forest.predict_proba(np.asarray(row, dtype=forest.input_dtype).reshape(1, -1))[0]
+        prediction_cache.put(row, proba, model_version=model.version)
+    return proba
+
+def explain_matrix(x, model=None):
+    # * (rows, universal_features) contributions to the leave probability; each row adds up to
+    # * predict_proba[:, leave_class_index] - path_explainer.expected_value[leave_class_index]
+    model = model or model_registry.current
+    return model.path_explainer.contributions(x, model.leave_class_index)
+
+def explain_cached(row, model=None):
+    # * contributions for one encoded row, served from explanation_cache when the same vector was seen before
+    model = model or model_registry.current
+    contributions = explanation_cache.get(row, model.version)
+    if contributions is None:
+        contributions = explain_matrix(row, model)[0]
+        explanation_cache.put(row, contributions, model_version=model.version)
+    return contributions
+
+# * model feature -> form / saved inputs field; the two age group columns are one field
+contribution_fields = {feature: field for field, feature in numeric_feature_map.items()}
+contribution_fields.update({'Age_group_Young_Adults': 'AgeGroup', 'Age_group_Adults': 'AgeGroup'})
+
+def field_contributions(contributions):
+    # * contributions summed per form field (Shapley values add up), field -> leave probability change
+    totals = {}
+    for feature, value in zip(universal_features, contributions):
+        field = contribution_fields[feature]
+        totals[field] = totals.get(field, 0.0) + float(value)
+    return totals
+
+def form_record(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm):
+    # * the form values as a record in the saved inputs file layout, for feature_encoder
+    return {
+        'AgeGroup': a_gro, 'EnvironmentSatisfaction': env_s, 'JobSatisfaction': j_stf,
+        'RelationshipSatisfaction': r_sts, 'PerformanceRating': pf_rt, 'WorkLifeBalance': wl_bl,
+        'JobInvolvement': j_inv, 'JobLevel': j_lvl, 'OverTime': ovr_t, 'MonthlyIncome': m_inc,
+        'YearsAtCompany': y_com, 'TotalWorkingYears': tw_yr, 'YearsSinceLastPromotion': y_prm,
+    }
+
+def explain_prediction(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm, top=3, model=None):
+    # * the form fields that moved the leave probability most, as (field, change) largest first
+    row = feature_encoder.encode_one(form_record(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm))[0]
+    totals = field_contributions(explain_cached(row, model))
+    return sorted(totals.items(), key=lambda item: abs(item[1]), reverse=True)[:top]
+
+def make_prediction(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm, model=None):
     # ************************************
     # * These are used in the cpf_output_table
 
     # Convert Generation Group code to full name
-    orig_name_gg_mapping = {'a_gro_ya'      : 'Young Adult (18-30)',
-                            'a_gro_a'       : 'Adult (30-60)',
-                            'a_gro_ret'     : 'Near Retirement (60+)' }
     gen_g_string = orig_name_gg_mapping[a_gro]
 
     # ************************************
 
-    columns = universal_features
+    # Custom prediction data in universal_features order, form values ('1', 2000, ...) coerced to float32;
+    # raises ValueError for an unknown age group or a value that is not a number equal or more than 0
+    prediction_data = feature_encoder.encode_one(form_record(env_s, j_stf, r_sts, pf_rt, wl_bl, j_inv, j_lvl, a_gro, ovr_t, m_inc, y_com, tw_yr, y_prm))[0]
+    # Predict (repeated forms are answered from the prediction cache), one model for the whole prediction
+    model = model or model_registry.current
+    pred_proba = predict_proba_cached(prediction_data, model)
+    predicted_index = pred_proba.argmax()
+    pred_data = model.compiled_forest.classes_.take([predicted_index])
+
+    # Confidence of this prediction: the forest's probability for the predicted class,
+    # and the calibrated probability of the same class when the model has a calibration map
+    confidence = '{:.2%}'.format(pred_proba[predicted_index])
+    calibrated_leave = calibrate(pred_proba[model.leave_class_index], model)
+    if calibrated_leave is not None:
+        calibrated_confidence = calibrated_leave if predicted_index == model.leave_class_index else 1.0 - calibrated_leave
+        confidence += ' (calibrated: ' + '{:.2%}'.format(calibrated_confidence) + ')'
 
-    # Department_mapping
-    age_type = age_mapping.get(a_gro)
-    
-    # Initialization of dataframe with the custom prediction data
-    prediction_data = pd.DataFrame([age_type + [env_s, j_inv, j_lvl, j_stf, m_inc, ovr_t, pf_rt, r_sts, tw_yr, wl_bl, y_com, y_prm]], columns = columns)
-    # Predict
-    model_score = float(loaded_rf_model.score(x_test,y_test))
-    pred_data = loaded_rf_model.predict(prediction_data)
     pred_output = ''
     pred_to_csv = ''
 
     if pred_data == [0]:
-        pred_output = ('Employee predicted to STAY.' + ' Confidence: ' + ('{:.2%}'.format(model_score)))
+        pred_output = ('Employee predicted to STAY.' + ' Confidence: ' + confidence)
         pred_to_csv = ('STAY')
     else:
-        pred_output = ('Employee predicted to LEAVE.' + ' Confidence: ' + ('{:.2%}'.format(model_score)))
+        pred_output = ('Employee predicted to LEAVE.' + ' Confidence: ' + confidence)
         pred_to_csv = ('LEAVE')
 
     return pred_output, pred_to_csv, gen_g_string
\ No newline at end of file
@@ -0,0 +1,39 @@
+# Standard library imports
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+# -------------------------------------------------------------------------------------------------------
+# * process and connection helpers
+# * the app runs in threaded gunicorn workers forked from a preloaded master (gunicorn.conf.py), so:
+# * - process pools start their workers with spawn instead of fork: a forked child only gets the
+# *   calling thread, and a lock another thread held at that moment (logging, the inference executor,
+# *   the micro-batcher, a request thread) stays held in the child forever. Spawned workers start a
+# *   fresh interpreter and import just the module of the function they run, which is why the modules
+# *   using spawn_pool keep bpred, dataset and the plotting libraries out of their top-level imports
+# * - sqlite3 connections are opened per thread and again after a fork: a connection must not be used
+# *   by two threads at once, and one inherited through fork shares its file locks with the parent
+
+def spawn_pool(max_workers, initializer=None, initargs=()):
+    # * ProcessPoolExecutor whose workers are spawned, safe to create from a request thread
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=initializer, initargs=initargs)
+
+
+class SQLiteConnections:
+    # * the calling thread's connection to the database at path, in autocommit mode
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def get(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or getattr(self.local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
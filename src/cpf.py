@@ -26,6 +26,9 @@ table_csv_inputs_column_names_save_file = ['AgeGroup', 'EnvironmentSatisfaction'
                 'PerformanceRating', 'WorkLifeBalance', 'JobInvolvement', 'JobLevel', 'OverTime', 'MonthlyIncome', 
                 'YearsAtCompany', 'TotalWorkingYears', 'YearsSinceLastPromotion', 'OUTPUT']
 
+# * saved inputs file name -> label shown in the form's table
+field_labels = dict(zip(table_csv_inputs_column_names_save_file, table_csv_inputs_column_names))
+
 # -------------------------------------------------------------------------------------------------------
 # * Custom Prediction Forms
 # * cpf means Custom Prediction forms
@@ -465,6 +468,24 @@ cpf_output = dbc.Row(
     className='mb-3',
 )
 
+# -------------------------------------------------------------------------------------------------------
+# * the inputs that moved the prediction most (bpred.explain_prediction), filled on Submit
+cpf_explanation = dbc.Row(
+    [
+        dbc.Label('Top factors', html_for='cpf_explanation', width=2),
+        dbc.Col(html.Div(id='cpf_explanation'), width=10),
+    ],
+    className='mb-3',
+)
+
+
+def explanation_list(factors):
+    # * (field, leave probability change) pairs as a list, e.g. 'Over Time: +12.3 pts toward LEAVE'
+    return html.Ul([
+        html.Li('{}: {:+.1f} pts toward {}'.format(field_labels.get(field, field), change * 100, 'LEAVE' if change > 0 else 'STAY'))
+        for field, change in factors
+    ], style={'marginBottom': 0})
+
 # -------------------------------------------------------------------------------------------------------
 cpf_output_table = dbc.Row(
     [
@@ -473,6 +494,17 @@ cpf_output_table = dbc.Row(
                 id='cpf_output_table',
                 columns=[{'name': i, 'id': i} for i in table_csv_inputs_column_names],
                 editable=False,
+                # paging, sorting and filtering run on the server (app.update_history_table),
+                # only the visible page of the history is sent to the browser
+                page_action='custom',
+                page_current=0,
+                page_size=10,
+                page_count=0,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
                 style_cell_conditional=[
                     {
                         'if': {'column_id': i},
@@ -516,6 +548,57 @@ cpf_output_table = dbc.Row(
     className='mb-3',
 )
 
+# -------------------------------------------------------------------------------------------------------
+# * what-if sweep: the chosen input is varied over its range with the other inputs as entered (sweep.py)
+sweep_cpf_input = dbc.Row(
+    [
+        dbc.Label('What-if:', html_for='sweep_field_cpf', width=2),
+        dbc.Col(
+            dbc.Select(
+                options=[
+                    {'label': label, 'value': field}
+                    for field, label in zip(table_csv_inputs_column_names_save_file[1:-1], table_csv_inputs_column_names[1:-1])
+                ],
+                id='sweep_field_cpf',
+                value='MonthlyIncome',
+            ),
+            width=7,
+        ),
+        dbc.Col(dbc.Button('Sweep', id='sweep_button_id', n_clicks=0), width=3),
+        html.Div(id='sweep_status'),
+        dcc.Graph(id='sweep_graph', style={'display': 'none'}),
+    ],
+    className='mb-3',
+)
+
+# -------------------------------------------------------------------------------------------------------
+# * batch prediction: upload a csv in the saved inputs file layout and download it scored
+batch_upload = dbc.Row(
+    [
+        dbc.Label('Batch Prediction:', html_for='batch_upload', width=2),
+        dbc.Col(
+            [
+                dcc.Upload(
+                    id='batch_upload',
+                    children=html.Div(['Drag and drop or ', html.A('select a CSV file'), ' with the same columns as a saved inputs file']),
+                    style={
+                        'borderWidth': '1px',
+                        'borderStyle': 'dashed',
+                        'borderRadius': '5px',
+                        'textAlign': 'center',
+                        'padding': '10px',
+                    },
+                    multiple=False,
+                ),
+                html.Div(id='batch_upload_status', style={'marginTop': '5px'}),
+                dcc.Download(id='download_batch_csv'),
+            ],
+            width=10,
+        ),
+    ],
+    className='mb-3',
+)
+
 # -------------------------------------------------------------------------------------------------------
 # * prints out all of the form and shows the output and the table
 custom_prediction_form = dbc.Form(
@@ -534,12 +617,28 @@ custom_prediction_form = dbc.Form(
         totwork_years_cpf_input,
         ysl_promote_cpf_input,
         cpf_output,
+        cpf_explanation,
         html.Div([
             dbc.Button('Submit', id='submit_button_id', color='primary', n_clicks=0, style={'margin-right': '10px'}),
             dbc.Button('Save inputs', id='save_button_id', n_clicks=0, style={'margin-right': '10px'}),
-            dcc.Download(id="download_dataframe_csv"),
+            dbc.Select(
+                options=[
+                    {'label': 'CSV', 'value': 'csv'},
+                    {'label': 'CSV (gzip)', 'value': 'csv.gz'},
+                    {'label': 'Parquet', 'value': 'parquet'},
+                ],
+                id='save_format_cpf',
+                value='csv',
+                style={'display': 'inline-block', 'width': 'auto'},
+            ),
+            # the saved file is streamed from /api/v1/history/<id>/export, loading it here starts the download
+            html.Iframe(id='history_export_frame', style={'display': 'none'}),
         ], style={'textAlign': 'center'}),
         html.Hr(),
-        cpf_output_table
+        sweep_cpf_input,
+        html.Hr(),
+        cpf_output_table,
+        html.Hr(),
+        batch_upload
     ]
 )
\ No newline at end of file
@@ -0,0 +1,37 @@
+# Related third party imports for data manipulation
+import numpy as np
+
+
+# -------------------------------------------------------------------------------------------------------
+# * binned crosstabs
+# * counts of (bin of a column, target class) for many columns at once, without touching the frame:
+# * every column is binned with np.digitize (left-closed bins like pd.cut(..., right=False)), the
+# * (column, bin, class) cells are laid out one after another and a single np.bincount counts them all;
+# * an optional group per row (e.g. a flattened Department x JobRole x Gender index) turns every crosstab into a cube
+
+def bin_codes(values, bins):
+    # * index of the bin [bins[i], bins[i + 1]) each value falls in, -1 for values outside every bin (and NaN)
+    codes = np.digitize(np.asarray(values, dtype=np.float64), bins) - 1
+    codes[codes >= len(bins) - 1] = -1
+    return codes
+
+
+def binned_crosstabs(columns, target, specs, n_classes=2, groups=None, n_groups=1):
+    # * columns: column name -> array, target: integer class per row (0 .. n_classes - 1)
+    # * specs: dicts with 'name', 'column' and 'bins'; returns name -> (bins - 1, n_classes) int64 counts
+    # * groups (integer group per row, 0 .. n_groups - 1) adds a leading axis: name -> (n_groups, bins - 1, n_classes)
+    target = np.asarray(target, dtype=np.int64)
+    group_cells = 0 if groups is None else np.asarray(groups, dtype=np.int64)
+    offsets = np.cumsum([0] + [n_groups * (len(spec['bins']) - 1) * n_classes for spec in specs])
+    cells = []
+    for spec, offset in zip(specs, offsets):
+        n_bins = len(spec['bins']) - 1
+        codes = bin_codes(columns[spec['column']], spec['bins'])
+        cell = offset + ((group_cells * n_bins + codes) * n_classes + target)
+        cells.append(cell[codes >= 0])
+    counts = np.bincount(np.concatenate(cells), minlength=offsets[-1]) if cells else np.zeros(0, dtype=np.int64)
+    shape = (-1, n_classes) if groups is None else (n_groups, -1, n_classes)
+    return {
+        spec['name']: counts[offset:next_offset].reshape(shape)
+        for spec, offset, next_offset in zip(specs, offsets[:-1], offsets[1:])
+    }
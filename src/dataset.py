@@ -0,0 +1,152 @@
+# Standard library imports
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+# Related third party imports for data manipulation
+import pandas as pd
+
+
+# -------------------------------------------------------------------------------------------------------
+# * Initializations
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# * the raw IBM HR extract that ships with the repo
+raw_csv_path = os.path.join(script_dir, 'IBM_HR_Dataset.csv')
+
+# * processed feature table (Arrow/Feather, uncompressed) and its checksum manifest
+data_dir = os.path.join(script_dir, 'data')
+processed_path = os.path.join(data_dir, 'ibm_hr_processed.feather')
+manifest_path = os.path.join(data_dir, 'ibm_hr_processed.json')
+
+# * same bins the Age Group bar chart uses; Near Retirement is the dropped dummy
+age_group_bins = [18, 30, 50, 99]
+age_group_labels = ['Young_Adults', 'Adults', 'Near_Retirement']
+
+processed_columns = [
+    'Age',
+    'Age_group_Young_Adults', 'Age_group_Adults',
+    'EnvironmentSatisfaction', 'JobInvolvement', 'JobLevel',
+    'JobSatisfaction', 'MonthlyIncome', 'OverTime_Yes',
+    'PerformanceRating', 'RelationshipSatisfaction', 'TotalWorkingYears',
+    'WorkLifeBalance', 'YearsAtCompany', 'YearsSinceLastPromotion', 'Attrition_Yes'
+  ]
+
+# * raw columns the dashboard filters the population by; not model inputs, so not in the processed table
+segment_columns = ['Department', 'JobRole', 'Gender']
+
+
+# -------------------------------------------------------------------------------------------------------
+# * Build
+
+def sha256_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def build_processed(csv_path=raw_csv_path):
+    # * encodes the raw extract into the columns the model and the dashboard use
+    # * the csv is saved with a BOM, utf-8-sig keeps the first header as 'Age'
+    raw = pd.read_csv(csv_path, encoding='utf-8-sig')
+
+    age_group = pd.cut(raw['Age'], bins=age_group_bins, labels=age_group_labels, right=False)
+
+    df = pd.DataFrame({'Age': raw['Age']})
+    df['Age_group_Young_Adults'] = (age_group == 'Young_Adults').astype('int64')
+    df['Age_group_Adults'] = (age_group == 'Adults').astype('int64')
+    for column in ['EnvironmentSatisfaction', 'JobInvolvement', 'JobLevel', 'JobSatisfaction', 'MonthlyIncome']:
+        df[column] = raw[column]
+    df['OverTime_Yes'] = (raw['OverTime'] == 'Yes').astype('int64')
+    for column in ['PerformanceRating', 'RelationshipSatisfaction', 'TotalWorkingYears',
+                   'WorkLifeBalance', 'YearsAtCompany', 'YearsSinceLastPromotion']:
+        df[column] = raw[column]
+    df['Attrition_Yes'] = (raw['Attrition'] == 'Yes').astype('int64')
+
+    return df[processed_columns].astype('int64')
+
+
+def save_processed(df, path=processed_path, csv_path=raw_csv_path):
+    # * writes the table plus a manifest holding its checksum and the checksum of the csv it came from
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+    manifest = {
+        'file': os.path.basename(path),
+        'sha256': sha256_file(path),
+        'source': os.path.basename(csv_path),
+        'source_sha256': sha256_file(csv_path),
+        'rows': int(len(df)),
+        'columns': list(df.columns),
+    }
+    tmp_manifest = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+    return manifest
+
+
+# -------------------------------------------------------------------------------------------------------
+# * Load
+
+def read_manifest():
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify_processed(csv_path=raw_csv_path):
+    # * True when the bundled table is present, its bytes match the manifest and it was built
+    # * from the current extract (a refreshed csv rebuilds the table)
+    manifest = read_manifest()
+    if manifest is None or not os.path.exists(processed_path):
+        return False
+    if os.path.exists(csv_path) and sha256_file(csv_path) != manifest.get('source_sha256'):
+        return False
+    return sha256_file(processed_path) == manifest.get('sha256')
+
+
+@lru_cache(maxsize=None)
+def load_processed():
+    # * the processed feature table, loaded once per process; callers copy before adding columns
+    # * a missing or corrupt artifact is rebuilt from the bundled csv, so this never needs the network
+    if not verify_processed():
+        df = build_processed()
+        try:
+            save_processed(df)
+        except OSError:
+            pass
+        return df
+    return pd.read_feather(processed_path)
+
+
+@lru_cache(maxsize=None)
+def load_segments():
+    # * segment_columns of the raw extract, row for row with load_processed() (both come from the same csv)
+    segments = pd.read_csv(raw_csv_path, encoding='utf-8-sig', usecols=segment_columns)[segment_columns]
+    if len(segments) != len(load_processed()):
+        raise ValueError(f'{os.path.basename(raw_csv_path)} and {os.path.basename(processed_path)} have different row counts')
+    return segments
+
+
+def dataset_sha256():
+    # * identifies the data the figures and metadata were computed from
+    df = load_processed()
+    manifest = read_manifest()
+    if manifest is None:
+        # read-only deploy where the rebuilt table could not be saved
+        return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+    return manifest['sha256']
+
+
+if __name__ == "__main__":
+    # * build step: python dataset.py rebuilds data/ibm_hr_processed.feather from IBM_HR_Dataset.csv
+    print(json.dumps(save_processed(build_processed()), indent=2))
@@ -0,0 +1,118 @@
+# Standard library imports
+import math
+import threading
+
+# Related third party imports for data manipulation
+import numpy as np
+
+
+# -------------------------------------------------------------------------------------------------------
+# * feature encoder
+# * turns records in the saved inputs file layout (AgeGroup, EnvironmentSatisfaction, ...) into the
+# * model's feature matrix, without pandas: the form, the JSON API and the batch upload all use the
+# * same FeatureEncoder (bpred.feature_encoder), so every path produces the same float32 vectors
+
+# sklearn and the compiled forest both compare float32 features
+encoded_dtype = np.float32
+
+
+def to_float(value):
+    # * float(value) for numbers and numeric strings ('1', ' 2.5 '), NaN for anything else
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def coerce_numbers(values):
+    # * float64 array of the values, NaN where a value is not a number
+    try:
+        # numbers and numeric strings convert in one call, the common case
+        numbers = np.asarray(values, dtype=np.float64)
+        if numbers.ndim == 1:
+            return numbers
+    except (TypeError, ValueError):
+        pass
+    return np.fromiter((to_float(value) for value in values), dtype=np.float64, count=len(values))
+
+
+class FeatureEncoder:
+    def __init__(self, feature_names, numeric_fields, category_field, category_features, categories):
+        # * feature_names: model feature order
+        # * numeric_fields: record field -> feature, values must be numbers equal or more than 0
+        # * category_field: the one categorical field (AgeGroup), one-hot encoded into category_features
+        # * categories: accepted category value -> one-hot list aligned with category_features
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.numeric_fields = dict(numeric_fields)
+        self.category_field = category_field
+        self.category_index = np.array([self.feature_names.index(f) for f in category_features])
+        self.categories = {value: np.asarray(one_hot, dtype=encoded_dtype) for value, one_hot in categories.items()}
+        self.numeric_index = [(field, self.feature_names.index(feature)) for field, feature in self.numeric_fields.items()]
+        self.fields = [category_field] + list(self.numeric_fields)
+        self.local = threading.local()
+
+    def check_fields(self, fields):
+        # * raises ValueError naming the missing fields
+        missing = [field for field in self.fields if field not in fields]
+        if missing:
+            raise ValueError('Missing column(s): ' + ', '.join(missing))
+
+    def _row_buffer(self):
+        # one preallocated row per thread for encode_one
+        row = getattr(self.local, 'row', None)
+        if row is None:
+            row = self.local.row = np.zeros((1, self.n_features), dtype=encoded_dtype)
+        return row
+
+    def encode_one(self, record):
+        # * (1, n_features) row for one record, raises ValueError on a missing or invalid value
+        # * the row is a per-thread buffer: use it (or copy it) before the next encode_one on the same thread
+        self.check_fields(record)
+        row = self._row_buffer()
+        one_hot = self.categories.get(str(record[self.category_field]).strip())
+        if one_hot is None:
+            raise ValueError(f'{self.category_field}: unknown value')
+        row[0, self.category_index] = one_hot
+        for field, index in self.numeric_index:
+            value = to_float(record[field])
+            if not (value >= 0 and math.isfinite(value)):
+                raise ValueError(f'{field}: expected a number equal or more than 0')
+            row[0, index] = value
+        return row
+
+    def encode_columns(self, columns):
+        # * vectorized encoding of column-wise data (a dict of sequences, or a DataFrame read as str)
+        # * returns the matrix, a mask of rows that could be encoded and a per-row error message;
+        # * invalid rows are left as zeros
+        self.check_fields(columns)
+        category_values = np.asarray(columns[self.category_field], dtype=str)
+        n_rows = len(category_values)
+        x = np.zeros((n_rows, self.n_features), dtype=encoded_dtype)
+        errors = np.full(n_rows, '', dtype=object)
+
+        # one lookup per distinct value instead of one per row
+        uniques, inverse = np.unique(np.char.strip(category_values), return_inverse=True)
+        known = np.array([value in self.categories for value in uniques], dtype=bool)
+        one_hot = np.array([self.categories.get(value, np.zeros(len(self.category_index), dtype=encoded_dtype)) for value in uniques],
+                           dtype=encoded_dtype).reshape(len(uniques), len(self.category_index))
+        x[:, self.category_index] = one_hot[inverse]
+        errors[~known[inverse]] = f'{self.category_field}: unknown value'
+
+        for field, index in self.numeric_index:
+            values = coerce_numbers(columns[field])
+            bad = ~np.isfinite(values) | (values < 0)
+            errors[bad & (errors == '')] = f'{field}: expected a number equal or more than 0'
+            x[:, index] = np.where(bad, 0, values)
+
+        valid = errors == ''
+        return x, valid, errors
+
+    def encode(self, records):
+        # * batch encoding of a list of records (dicts); raises ValueError if a record lacks a field
+        for record in records:
+            self.check_fields(record)
+        columns = {field: [record[field] for record in records] for field in self.fields}
+        return self.encode_columns(columns)
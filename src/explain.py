@@ -0,0 +1,192 @@
+# Standard library imports
+import json
+import os
+
+# Related third party imports for data manipulation
+import numpy as np
+
+
+# -------------------------------------------------------------------------------------------------------
+# * path-dependent TreeSHAP
+# * exact per-feature contributions of a fitted sklearn RandomForestClassifier, computed from the trees
+# * alone (no background data): a feature on the path to a leaf is either fixed to the input or
+# * marginalised with the training cover of the branches, as in Lundberg et al.'s path-dependent TreeSHAP
+# *
+# * every root-to-leaf path is flattened once into its unique features: for a feature the path splits
+# * on, zero = product of the cover ratios of its splits, and the input follows the path on that
+# * feature exactly when lo < x <= hi (the thresholds of those splits). A leaf then contributes a
+# * product game  v(S) = value * prod_{j in S} one_j * prod_{j not in S} zero_j  whose Shapley values
+# * have a closed form (see _group_phi); all leaves and rows are done together with numpy
+# * contributions + expected value add up to the forest's predict_proba
+
+# arrays written by PathExplainer.save, one uncompressed .npy file each
+array_names = ['slot_feature', 'slot_zero', 'slot_lo', 'slot_hi', 'leaf_value', 'group_bounds']
+
+# (rows x leaves x slots x nodes) cells worked on at once, bounds the temporary arrays
+chunk_cells = 1 << 21
+
+
+def quadrature(n_slots):
+    # * Gauss-Legendre nodes and weights on [0, 1], exact for the degree n_slots - 1 polynomials below
+    nodes, weights = np.polynomial.legendre.leggauss(max(1, (n_slots + 1) // 2))
+    return (nodes + 1.0) / 2.0, weights / 2.0
+
+
+class PathExplainer:
+    def __init__(self, slot_feature, slot_zero, slot_lo, slot_hi, leaf_value, group_bounds, n_trees, n_features, classes):
+        self.slot_feature = slot_feature    # (n_leaves, max_slots) int64, feature of every unique-feature slot
+        self.slot_zero = slot_zero          # (n_leaves, max_slots) float64, cover fraction when the feature is left out
+        self.slot_lo = slot_lo              # (n_leaves, max_slots) float64, the input follows the path when lo < x <= hi
+        self.slot_hi = slot_hi              # (n_leaves, max_slots) float64
+        self.leaf_value = leaf_value        # (n_leaves, n_classes) float64, normalised class probabilities
+        self.group_bounds = group_bounds    # (n_groups + 1,) int64, leaves sorted by slot count, group g has g real slots
+        self.n_trees = int(n_trees)
+        self.n_features = int(n_features)
+        self.classes_ = classes
+        self.tables = {}
+        # E[f(x)] under the tree covers: every leaf weighted by its share of the root's samples
+        self.expected_value = (leaf_value * slot_zero.prod(axis=1)[:, np.newaxis]).sum(axis=0) / self.n_trees
+
+    @classmethod
+    def from_sklearn(cls, model):
+        leaves = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            cover = tree.weighted_n_node_samples
+            proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba = proba / normalizer
+
+            # depth-first walk carrying feature -> [zero, lo, hi] of the path so far
+            stack = [(0, {})]
+            while stack:
+                node, path = stack.pop()
+                left, right = tree.children_left[node], tree.children_right[node]
+                if left == -1:
+                    leaves.append((path, proba[node]))
+                    continue
+                feature, threshold = int(tree.feature[node]), float(tree.threshold[node])
+                zero, lo, hi = path.get(feature, (1.0, -np.inf, np.inf))
+                # sklearn goes left when x <= threshold
+                stack.append((left, {**path, feature: (zero * cover[left] / cover[node], lo, min(hi, threshold))}))
+                stack.append((right, {**path, feature: (zero * cover[right] / cover[node], max(lo, threshold), hi)}))
+
+        max_slots = max(len(path) for path, _ in leaves)
+        leaves.sort(key=lambda leaf: len(leaf[0]))
+        n_leaves = len(leaves)
+        slot_feature = np.zeros((n_leaves, max_slots), dtype=np.int64)
+        slot_zero = np.ones((n_leaves, max_slots), dtype=np.float64)
+        # pad slots: lo = +inf never matches and zero = 1, so they leave the expected value unchanged
+        slot_lo = np.full((n_leaves, max_slots), np.inf, dtype=np.float64)
+        slot_hi = np.full((n_leaves, max_slots), np.inf, dtype=np.float64)
+        leaf_value = np.empty((n_leaves, model.n_classes_), dtype=np.float64)
+        for i, (path, value) in enumerate(leaves):
+            for s, (feature, (zero, lo, hi)) in enumerate(sorted(path.items())):
+                slot_feature[i, s] = feature
+                slot_zero[i, s] = zero
+                slot_lo[i, s] = lo
+                slot_hi[i, s] = hi
+            leaf_value[i] = value
+        slot_counts = np.array([len(path) for path, _ in leaves])
+        group_bounds = np.searchsorted(slot_counts, np.arange(max_slots + 2)).astype(np.int64)
+
+        return cls(
+            slot_feature=slot_feature,
+            slot_zero=slot_zero,
+            slot_lo=slot_lo,
+            slot_hi=slot_hi,
+            leaf_value=leaf_value,
+            group_bounds=group_bounds,
+            n_trees=len(model.estimators_),
+            n_features=model.n_features_in_,
+            classes=np.asarray(model.classes_),
+        )
+
+    def save(self, directory):
+        # * same layout as forest.CompiledForest.save: one .npy per array and a small json
+        os.makedirs(directory, exist_ok=True)
+        for name in array_names:
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        header = {
+            'n_trees': self.n_trees,
+            'n_features': self.n_features,
+            'classes': self.classes_.tolist(),
+        }
+        with open(os.path.join(directory, 'explainer.json'), 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, 'explainer.json'), encoding='utf-8') as f:
+            header = json.load(f)
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode))
+            for name in array_names
+        }
+        return cls(
+            n_trees=header['n_trees'],
+            n_features=header['n_features'],
+            classes=np.array(header['classes']),
+            **arrays,
+        )
+
+    def _group_tables(self, n_slots, start, stop, class_index):
+        # * per-model constants of a group, built on first use: with one_j in {0, 1} every factor
+        # * (1 - t) * zero_j + t * one_j is one of two known values per quadrature node
+        key = (n_slots, class_index)
+        tables = self.tables.get(key)
+        if tables is None:
+            t, w = quadrature(n_slots)
+            zero = self.slot_zero[start:stop, :n_slots]
+            value = self.leaf_value[start:stop, class_index]
+            unmatched = zero[:, :, np.newaxis] * (1.0 - t)                  # (leaves, slots, nodes)
+            matched = unmatched + t
+            # a matched slot i gets value * (1 - zero_i) * sum_q w_q * product_q / matched_iq,
+            # every unmatched slot the same -value * sum_q w_q * product_q / (1 - t_q)
+            matched_phi = (value[:, np.newaxis] * (1.0 - zero))[:, np.newaxis, :] * (w[:, np.newaxis] / matched.transpose(0, 2, 1))
+            unmatched_phi = -value[:, np.newaxis] * (w / (1.0 - t))
+            tables = self.tables[key] = {
+                'log_base': np.log(unmatched).sum(axis=1)[:, np.newaxis, :],   # log prod_j factor with every one_j = 0
+                'log_ratio': np.log(matched) - np.log(unmatched),           # added for every one_j = 1
+                'matched_phi': matched_phi,                                 # (leaves, nodes, slots)
+                'unmatched_phi': unmatched_phi[:, :, np.newaxis],           # (leaves, nodes, 1)
+            }
+        return tables
+
+    def _group_phi(self, x, start, stop, n_slots, class_index):
+        # * contributions of the leaves [start, stop), which all have n_slots unique features, for the rows of x
+        # * the Shapley weight k! (d - k - 1)! / d! is the integral of t^k (1 - t)^(d - k - 1) over [0, 1], so
+        # * phi_i = value * (one_i - zero_i) * integral of prod_{j != i} ((1 - t) * zero_j + t * one_j) dt,
+        # * a polynomial in t that a few quadrature nodes integrate exactly
+        # arrays are (leaves, rows, slots) or (leaves, rows, nodes): one small matmul per leaf, batched
+        tables = self._group_tables(n_slots, start, stop, class_index)
+        feature = self.slot_feature[start:stop, :n_slots]
+        xs = x[:, feature].transpose(1, 0, 2)
+        one = (xs > self.slot_lo[start:stop, np.newaxis, :n_slots]) & (xs <= self.slot_hi[start:stop, np.newaxis, :n_slots])
+
+        # the product over all slots at every quadrature node, then the leave-one-out integrals
+        product = np.exp(tables['log_base'] + np.matmul(one.astype(np.float64), tables['log_ratio']))
+        leaf_phi = np.where(one, np.matmul(product, tables['matched_phi']), np.matmul(product, tables['unmatched_phi']))
+
+        # scatter onto the features: one bincount over (row, feature) cells
+        cells = np.arange(x.shape[0])[np.newaxis, :, np.newaxis] * self.n_features + feature[:, np.newaxis, :]
+        return np.bincount(cells.ravel(), weights=leaf_phi.ravel(), minlength=x.shape[0] * self.n_features).reshape(x.shape[0], -1)
+
+    def contributions(self, x, class_index=1):
+        # * (rows, n_features) contributions to predict_proba[:, class_index];
+        # * each row sums to predict_proba - expected_value[class_index]
+        x = np.asarray(x, dtype=np.float32).astype(np.float64)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        out = np.zeros((x.shape[0], self.n_features), dtype=np.float64)
+        bounds = self.group_bounds
+        for n_slots in range(1, len(bounds) - 1):
+            start, stop = int(bounds[n_slots]), int(bounds[n_slots + 1])
+            if start == stop:
+                continue
+            rows_per_chunk = max(1, chunk_cells // ((stop - start) * n_slots * ((n_slots + 1) // 2)))
+            for row_start in range(0, x.shape[0], rows_per_chunk):
+                rows = slice(row_start, row_start + rows_per_chunk)
+                out[rows] += self._group_phi(x[rows], start, stop, n_slots, class_index)
+        return out / self.n_trees
@@ -0,0 +1,83 @@
+# Standard library imports
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+
+# Third-party imports for visualization
+import plotly.utils
+
+# Local application/library specific imports
+import bpred as bd
+import dataset
+
+
+# -------------------------------------------------------------------------------------------------------
+# * figure cache
+# * every dashboard figure is built once per (dataset, model) pair and stored under
+# * cache/figures/<key>/ as plotly json; workers only read these files
+# * (the static seaborn images are content addressed on their own, see render_cache.py)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+cache_root = os.path.join(script_dir, 'cache', 'figures')
+
+# model sha256 -> key, a reload swaps the model (bpred.model_registry) and with it the key
+_cache_keys = {}
+
+
+def cache_key(model_sha256=None):
+    # * short hash of the processed dataset and a model (sha256 of its joblib file), the current one by default
+    if model_sha256 is None:
+        model_sha256 = bd.model_registry.current.sha256
+    key = _cache_keys.get(model_sha256)
+    if key is None:
+        combined = dataset.dataset_sha256() + model_sha256
+        key = _cache_keys[model_sha256] = hashlib.sha256(combined.encode('utf-8')).hexdigest()[:16]
+    return key
+
+
+def cache_dir():
+    path = os.path.join(cache_root, cache_key())
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _tmp_path(path):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{os.getpid()}.tmp{ext}'
+
+
+@contextlib.contextmanager
+def build_lock(path):
+    # * exclusive lock on path + '.lock' shared by every process on the host: around a check-then-build
+    # * of a cache file, the first process builds it and the others wait and then read what it wrote
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_figures(name, builder):
+    # * returns the json-decoded figures stored under name, calling builder() on a miss
+    # * builder returns a dict of plotly figures and plain json values (counts, labels, ...)
+    path = os.path.join(cache_dir(), f'{name}.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    # round trip through json so a miss returns exactly what a later hit would
+    encoded = json.dumps(builder(), cls=plotly.utils.PlotlyJSONEncoder)
+    try:
+        tmp_path = _tmp_path(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return json.loads(encoded)
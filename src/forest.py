@@ -0,0 +1,189 @@
+# Standard library imports
+import json
+import os
+
+# Related third party imports for data manipulation
+import numpy as np
+
+
+# -------------------------------------------------------------------------------------------------------
+# * compiled random forest
+# * every tree of a fitted sklearn RandomForestClassifier is copied into one set of flat arrays
+# * and all trees are walked at once with numpy indexing, one step per tree level
+# * the arithmetic follows sklearn's (float32 inputs, the per-tree leaf values exactly as stored in
+# * tree_.value, summed in tree order, divided by the number of trees) so the output is bit-identical
+# * to predict_proba; model_store.py checks that before it publishes a compiled forest
+
+# sklearn compares float32 features against float64 thresholds
+input_dtype = np.float32
+
+# rows scored per traversal pass, bounds the (trees x rows) working arrays
+chunk_rows = 8192
+
+# arrays written by CompiledForest.save, one uncompressed .npy file each
+array_names = ['feature', 'threshold', 'children', 'value', 'roots']
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, children, value, roots, max_depth, classes, feature_names):
+        self.feature = feature          # (n_nodes,) int64, split feature per node (0 on leaves)
+        self.threshold = threshold      # (n_nodes,) float64, +inf on leaves so they always go left
+        self.children = children        # (2 * n_nodes,) int64, left at 2*node, right at 2*node+1; leaves point to themselves
+        self.value = value              # (n_nodes, n_classes) float64, class probabilities as in tree_.value
+        self.roots = roots              # (n_trees,) int64, root node of every tree
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+    @classmethod
+    def from_sklearn(cls, model):
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            leaf = tree.children_left == -1
+
+            feature = np.where(leaf, 0, tree.feature).astype(np.int64)
+            threshold = np.where(leaf, np.inf, tree.threshold).astype(np.float64)
+            left = np.where(leaf, node_ids, tree.children_left) + offset
+            right = np.where(leaf, node_ids, tree.children_right) + offset
+
+            # DecisionTreeClassifier.predict_proba returns tree_.value as stored (class fractions since
+            # sklearn 1.4), renormalising here would change the last bit of some leaves
+            proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(np.stack([left, right], axis=1).astype(np.int64).ravel())
+            values.append(proba)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int64),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            feature_names=getattr(model, 'feature_names_in_', None),
+        )
+
+    def save(self, directory):
+        # * plain .npy files plus a small json, so load() can memory-map the arrays
+        os.makedirs(directory, exist_ok=True)
+        for name in array_names:
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        header = {
+            'max_depth': self.max_depth,
+            'classes': self.classes_.tolist(),
+            'feature_names': self.feature_names,
+        }
+        with open(os.path.join(directory, 'forest.json'), 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        # * with mmap_mode='r' the arrays are read-only views of the files, so every process that
+        # * loads the same directory shares one copy of the pages through the OS page cache
+        with open(os.path.join(directory, 'forest.json'), encoding='utf-8') as f:
+            header = json.load(f)
+        # np.asarray drops the np.memmap subclass (still backed by the mapping), its per-index overhead
+        # is a large share of a single-row prediction
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode))
+            for name in array_names
+        }
+        return cls(
+            max_depth=header['max_depth'],
+            classes=np.array(header['classes']),
+            feature_names=header['feature_names'],
+            **arrays,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _as_matrix(self, x):
+        # DataFrames are reordered to the training columns, everything else is taken as is
+        if hasattr(x, 'columns') and self.feature_names is not None:
+            x = x[self.feature_names]
+        x = np.asarray(x, dtype=input_dtype)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        return x
+
+    def _leaves(self, x):
+        # (n_trees, n_rows) leaf node of every tree for every row
+        feature, threshold, children = self.feature, self.threshold, self.children
+        if x.shape[0] == 1:
+            # one row (the prediction form): plain 1-d indexing, about half the per-level cost
+            row = x[0]
+            nodes = self.roots
+            for _ in range(self.max_depth):
+                nodes = children[(nodes << 1) + (row[feature[nodes]] > threshold[nodes])]
+            return nodes[:, np.newaxis]
+
+        nodes = np.repeat(self.roots[:, np.newaxis], x.shape[0], axis=1)
+        rows = np.arange(x.shape[0])[np.newaxis, :]
+        for _ in range(self.max_depth):
+            nodes = children[(nodes << 1) + (x[rows, feature[nodes]] > threshold[nodes])]
+        return nodes
+
+    def predict_proba(self, x):
+        x = self._as_matrix(x)
+        out = np.empty((x.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, x.shape[0], chunk_rows):
+            stop = start + chunk_rows
+            leaf_values = self.value[self._leaves(x[start:stop])]
+            # sequential sum over trees (cumsum), matching sklearn's tree-by-tree accumulation
+            out[start:stop] = np.cumsum(leaf_values, axis=0)[-1]
+        out /= self.n_trees
+        return out
+
+    def predict(self, x):
+        return self.classes_.take(np.argmax(self.predict_proba(x), axis=1), axis=0)
+
+
+class CompiledForestMismatch(RuntimeError):
+    pass
+
+
+def check_equivalence(model, compiled, x):
+    # * True when the compiled forest reproduces model.predict_proba exactly on x
+    return np.array_equal(model.predict_proba(x), compiled.predict_proba(x))
+
+
+def compile_checked(model, x):
+    # * CompiledForest of model, raises CompiledForestMismatch unless it is bit-identical to sklearn on x
+    compiled = CompiledForest.from_sklearn(model)
+    if not check_equivalence(model, compiled, x):
+        raise CompiledForestMismatch('The compiled forest does not reproduce predict_proba of the sklearn model.')
+    return compiled
+
+
+if __name__ == "__main__":
+    # * python forest.py compiles the bundled model, checks it against sklearn and times one row
+    import time
+
+    import bpred as bd
+    import dataset
+
+    df = dataset.load_processed()
+    x = df[bd.universal_features]
+    compiled = CompiledForest.from_sklearn(bd.loaded_rf_model)
+    print(f'trees: {compiled.n_trees}, nodes: {len(compiled.feature)}, max depth: {compiled.max_depth}')
+    print(f'bit-identical on the processed dataset: {check_equivalence(bd.loaded_rf_model, compiled, x)}')
+
+    row = x.to_numpy()[:1]
+    runs = 2000
+    started = time.perf_counter()
+    for _ in range(runs):
+        compiled.predict_proba(row)
+    print(f'single row: {(time.perf_counter() - started) / runs * 1e6:.1f} us')
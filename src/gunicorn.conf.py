@@ -0,0 +1,65 @@
+# Standard library imports
+import os
+import random
+import sys
+
+
+# -------------------------------------------------------------------------------------------------------
+# * gunicorn settings for production
+# * gunicorn --config src/gunicorn.conf.py --chdir src app:server
+# * app.py (dataset, model store, figure cache) is imported once in the master and the workers are
+# * forked from it, so they share the loaded arrays and figures copy-on-write instead of each importing it again
+# * the worker count comes from WEB_CONCURRENCY and the port from PORT, as gunicorn reads them by default
+
+preload_app = True
+
+# the first start after a deploy with an empty figure cache renders every figure
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 600))
+
+# 'gthread' lets one worker serve a slow callback and other requests at the same time
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# * a session's history rows, its table pages and its export can each land on a different worker,
+# * so under gunicorn the history lives in the shared SQLite file unless HISTORY_BACKEND says otherwise
+# * (set before the app is imported, history.py reads it at import)
+os.environ.setdefault('HISTORY_BACKEND', 'sqlite')
+
+
+def on_starting(server):
+    # * a per-process history store behind several workers loses rows, refuse to start with one
+    if server.cfg.workers > 1 and os.environ.get('HISTORY_BACKEND') == 'memory':
+        raise RuntimeError('HISTORY_BACKEND=memory keeps history per worker; use sqlite with more than one worker.')
+
+
+def when_ready(server):
+    # * runs in the master before the first worker is forked: warm everything once
+    if server.cfg.preload_app:
+        import health
+        try:
+            health.warm_up()
+        except Exception:
+            # workers retry in the background, /readyz reports the error meanwhile
+            server.log.exception('warm-up failed')
+
+
+def post_fork(server, worker):
+    # * every worker gets its own random state, otherwise all of them replay the master's sequence
+    random.seed()
+    if 'numpy' in sys.modules:
+        sys.modules['numpy'].random.seed()
+
+    # * drop any figure the master left open and the rc settings the builders changed
+    if 'matplotlib.pyplot' in sys.modules:
+        import matplotlib
+        import matplotlib.pyplot as plt
+        plt.close('all')
+        matplotlib.rcdefaults()
+
+    import health
+    health.reset_after_fork()
+    health.start_warm_up()
+
+    # * each worker watches models/ for a newer artifact and swaps it in without a restart
+    import bpred
+    bpred.model_registry.start_watching()
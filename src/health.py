@@ -0,0 +1,113 @@
+# Standard library imports
+import os
+import threading
+import time
+
+# Related third party imports for data manipulation
+import numpy as np
+
+# Third-party imports for web application
+from flask import jsonify
+
+# Local application/library specific imports
+import bpred as bd
+import importance
+import ranking
+import visuals as vs
+
+
+# -------------------------------------------------------------------------------------------------------
+# * health and readiness
+# * GET /healthz answers as soon as the process serves requests (liveness)
+# * GET /readyz answers 503 until warm_up() has run: the model pages are touched and every tab's
+# * figures are loaded, so the first real request does not pay for either
+# * under gunicorn.conf.py the warm-up runs once in the master before forking and every worker starts ready
+
+# plain dict rather than threading primitives, it has to survive os.fork()
+state = {'ready': False, 'warming': False, 'warm_up_s': None, 'error': None}
+state_lock = threading.Lock()
+
+
+def warm_up():
+    with state_lock:
+        if state['ready'] or state['warming']:
+            return
+        state['warming'] = True
+    started = time.perf_counter()
+    try:
+        warm_caches()
+    except Exception as e:
+        state['error'] = repr(e)
+        raise
+    finally:
+        state['warming'] = False
+    state['warm_up_s'] = round(time.perf_counter() - started, 3)
+    state['error'] = None
+    state['ready'] = True
+
+
+def warm_caches():
+    # one prediction pulls the memory-mapped forest into the page cache
+    bd.predict_proba_matrix(np.zeros((1, len(bd.universal_features))))
+    # and one explanation builds the explainer's per-class tables
+    bd.explain_matrix(np.zeros((1, len(bd.universal_features))))
+    # the tab containers are lru_cached, building them here shares them copy-on-write with forked workers
+    vs.bar_plot_selection_form()
+    vs.corr_heatmap_container()
+    vs.cfm_container()
+    vs.kde_plot_container()
+    vs.box_plot_container()
+    vs.auroc_container()
+    ranking.ranking_container()
+    importance.importance_container()
+
+
+@bd.model_registry.on_swap
+def warm_swapped_model(loaded):
+    # * after a model reload: visuals and ranking dropped their model figures in their own listeners,
+    # * importance.py keeps bpred out of its imports (spawned workers) so its container is dropped here;
+    # * the process stays ready and rebuilds them in the background, a request that comes first builds its own.
+    # * Nothing heavy runs per worker: the comparison candidates are stored per dataset (only the forest's
+    # * ROC curve is recomputed), and the importance file comes from train.py or from the one process that
+    # * holds its build lock
+    importance.importance_container.cache_clear()
+    threading.Thread(target=rewarm, name='re-warm', daemon=True).start()
+
+
+def rewarm():
+    try:
+        warm_caches()
+    except Exception as e:
+        state['error'] = repr(e)
+
+
+def start_warm_up():
+    # * background warm-up for processes that were not warmed before forking (no preload, dev server)
+    if state['ready'] or state['warming']:
+        return
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
+def reset_after_fork():
+    # the lock may have been held by another thread at fork time
+    global state_lock
+    state_lock = threading.Lock()
+    state['warming'] = False
+
+
+def register_routes(server):
+    @server.route('/healthz', methods=['GET'])
+    def healthz():
+        return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+    @server.route('/readyz', methods=['GET'])
+    def readyz():
+        body = {
+            'status': 'ready' if state['ready'] else 'warming',
+            'pid': os.getpid(),
+            'model_version': bd.model_registry.current.version,
+            'warm_up_s': state['warm_up_s'],
+        }
+        if state['error'] is not None:
+            body['error'] = state['error']
+        return jsonify(body), (200 if state['ready'] else 503)
@@ -0,0 +1,453 @@
+# Standard library imports
+import csv
+import io
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+# Third-party imports for web application
+from flask import Response, jsonify, request, stream_with_context
+
+# Local application/library specific imports
+import concurrency
+import cpf
+
+
+# -------------------------------------------------------------------------------------------------------
+# * prediction history
+# * the rows a user submits in the Custom Prediction Form live on the server, keyed by a session id;
+# * the browser only keeps {'session_id': ...} in the session_user_input store
+# * rows are lists in cpf.table_csv_inputs_column_names_save_file order (AgeGroup, ..., OUTPUT)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# * HISTORY_BACKEND=sqlite keeps history in a file shared by all workers, memory by default
+# * (gunicorn.conf.py defaults it to sqlite, a multi-worker server must not use memory)
+history_backend = os.environ.get('HISTORY_BACKEND', 'memory')
+history_db_path = os.environ.get('HISTORY_DB', os.path.join(script_dir, 'cache', 'history.sqlite3'))
+history_max_sessions = int(os.environ.get('HISTORY_MAX_SESSIONS', 1000))
+history_ttl_s = float(os.environ.get('HISTORY_TTL_S', 24 * 3600))
+
+# * the shared file drops expired rows and the sessions beyond max_sessions every expire_every appends of a process
+expire_every = 100
+
+# * rows read from the store and written out per block of an export
+export_batch_rows = 5000
+
+history_columns = cpf.table_csv_inputs_column_names_save_file
+
+# * cpf_output_table column id -> history column
+table_column_map = dict(zip(cpf.table_csv_inputs_column_names, history_columns))
+
+# * AgeGroup and OUTPUT are text, everything in between compares and sorts as a number
+numeric_columns = set(history_columns[1:-1])
+
+# * DataTable filter_query operators, longest first so '>=' is not read as '>'
+filter_operators = [
+    ('ge', ['ge ', '>=']), ('le', ['le ', '<=']), ('lt', ['lt ', '<']), ('gt', ['gt ', '>']),
+    ('ne', ['ne ', '!=']), ('eq', ['eq ', '=']), ('contains', ['contains ']),
+    ('datestartswith', ['datestartswith ']),
+]
+sql_operators = {'ge': '>=', 'le': '<=', 'lt': '<', 'gt': '>', 'ne': '!=', 'eq': '='}
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def parse_filter_query(filter_query):
+    # * '{Job Level} >= 2 && {OUTPUT} contains LEAVE' -> [('JobLevel', 'ge', 2.0), ('OUTPUT', 'contains', 'LEAVE')]
+    # * parts on unknown columns or with unknown operators are ignored
+    filters = []
+    for part in (filter_query or '').split(' && '):
+        start, end = part.find('{'), part.find('}')
+        column = table_column_map.get(part[start + 1:end]) if 0 <= start < end else None
+        if column is None:
+            continue
+        rest = part[end + 1:].strip() + ' '
+        # s= / i= style case-sensitive and case-insensitive spellings are treated as the plain operator
+        if rest[:1] in ('s', 'i') and any(rest[1:].startswith(s) for _, spellings in filter_operators for s in spellings):
+            rest = rest[1:]
+        for operator, spellings in filter_operators:
+            spelling = next((s for s in spellings if rest.startswith(s)), None)
+            if spelling is None:
+                continue
+            value = rest[len(spelling):].strip()
+            if value[:1] == value[-1:] and value[:1] in ('"', "'", '`') and len(value) > 1:
+                value = value[1:-1].replace('\\' + value[0], value[0])
+            elif operator in sql_operators:
+                value = _as_number(value, value)
+            filters.append((column, operator, value))
+            break
+    return filters
+
+
+def parse_sort_by(sort_by):
+    # * DataTable sort_by -> [('JobLevel', True), ...], True meaning descending
+    return [
+        (table_column_map[item['column_id']], item['direction'] == 'desc')
+        for item in (sort_by or []) if item.get('column_id') in table_column_map
+    ]
+
+
+def _as_number(value, default=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _matches(value, operator, target):
+    if operator == 'contains' or operator == 'datestartswith':
+        text = '' if value is None else str(value)
+        return str(target) in text if operator == 'contains' else text.startswith(str(target))
+    number, target_number = _as_number(value), _as_number(target)
+    if number is not None and target_number is not None:
+        value, target = number, target_number
+    else:
+        value, target = str(value), str(target)
+    if operator == 'eq':
+        return value == target
+    if operator == 'ne':
+        return value != target
+    try:
+        return {'ge': value >= target, 'le': value <= target, 'lt': value < target, 'gt': value > target}[operator]
+    except TypeError:
+        return False
+
+
+def _sort_key(column_index, numeric):
+    # numbers first in numeric order, then anything that is not a number as text
+    def key(row):
+        value = row[column_index]
+        number = _as_number(value) if numeric else None
+        return (0, number, '') if number is not None else (1, 0.0, '' if value is None else str(value))
+    return key
+
+
+class MemoryHistoryStore:
+    # * per-process store; the least recently used session is evicted past max_sessions,
+    # * and sessions idle longer than ttl_s are dropped
+    def __init__(self, max_sessions=history_max_sessions, ttl_s=history_ttl_s):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _session(self, session_id, create=False):
+        now = time.time()
+        entry = self.sessions.get(session_id)
+        if entry is not None and entry['touched'] + self.ttl_s < now:
+            del self.sessions[session_id]
+            entry = None
+        if entry is None:
+            if not create:
+                return None
+            entry = self.sessions[session_id] = {'rows': [], 'touched': now}
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        entry['touched'] = now
+        self.sessions.move_to_end(session_id)
+        return entry
+
+    def append(self, session_id, row):
+        with self.lock:
+            self._session(session_id, create=True)['rows'].append(list(row))
+
+    def count(self, session_id):
+        with self.lock:
+            entry = self._session(session_id)
+            return 0 if entry is None else len(entry['rows'])
+
+    def page(self, session_id, offset, limit):
+        # * rows [offset, offset + limit) in submission order
+        with self.lock:
+            entry = self._session(session_id)
+            return [] if entry is None else [list(row) for row in entry['rows'][offset:offset + limit]]
+
+    def query(self, session_id, offset, limit, filters=(), sort_by=()):
+        # * one page of the filtered, sorted history and the number of rows matching the filters
+        with self.lock:
+            entry = self._session(session_id)
+            rows = [] if entry is None else entry['rows']
+            for column, operator, target in filters:
+                column_index = history_columns.index(column)
+                rows = [row for row in rows if _matches(row[column_index], operator, target)]
+            # sorted() is stable, so applying the keys last to first gives a multi-column sort
+            for column, descending in reversed(list(sort_by)):
+                rows = sorted(rows, key=_sort_key(history_columns.index(column), column in numeric_columns), reverse=descending)
+            return [list(row) for row in rows[offset:offset + limit]], len(rows)
+
+    def iter_rows(self, session_id, batch_size=1000):
+        offset = 0
+        while True:
+            rows = self.page(session_id, offset, batch_size)
+            if not rows:
+                return
+            yield from rows
+            offset += len(rows)
+
+    def detach(self, session_id):
+        # * moves the rows to a new session id and returns it, the original session starts empty
+        with self.lock:
+            entry = self.sessions.pop(session_id, None)
+            export_id = new_session_id()
+            if entry is not None:
+                self.sessions[export_id] = entry
+            return export_id
+
+    def clear(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+
+class SQLiteHistoryStore:
+    # * append-only table shared by every worker on the machine, one row per submission;
+    # * rows older than ttl_s and the least recently appended-to sessions past max_sessions are dropped by expire()
+    def __init__(self, path=history_db_path, max_sessions=history_max_sessions, ttl_s=history_ttl_s):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self.appends = 0
+        # per thread and per process, see concurrency.py
+        self.connections = concurrency.SQLiteConnections(path, timeout=5.0)
+        column_defs = ', '.join(f'"{column}" TEXT' for column in history_columns)
+        conn = self.connections.get()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS history ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, created REAL NOT NULL,'
+            f' {column_defs})'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS history_session ON history (session_id, seq)')
+        conn.execute('CREATE INDEX IF NOT EXISTS history_session_output ON history (session_id, "OUTPUT")')
+        conn.execute('CREATE INDEX IF NOT EXISTS history_created ON history (created)')
+        self.expire()
+
+    def expire(self, now=None):
+        # * deletes expired rows, then every session but the max_sessions with the latest appends
+        # * (detached exports that were never downloaded go the same way)
+        now = time.time() if now is None else now
+        try:
+            conn = self.connections.get()
+            conn.execute('DELETE FROM history WHERE created < ?', (now - self.ttl_s,))
+            conn.execute(
+                'DELETE FROM history WHERE session_id IN ('
+                ' SELECT session_id FROM history GROUP BY session_id ORDER BY MAX(seq) DESC LIMIT -1 OFFSET ?)',
+                (self.max_sessions,),
+            )
+        except sqlite3.OperationalError:
+            # busy, the next expire catches up
+            pass
+
+    def append(self, session_id, row):
+        columns = ', '.join(f'"{column}"' for column in history_columns)
+        placeholders = ', '.join('?' for _ in history_columns)
+        self.connections.get().execute(
+            f'INSERT INTO history (session_id, created, {columns}) VALUES (?, ?, {placeholders})',
+            [session_id, time.time()] + [None if value is None else str(value) for value in row],
+        )
+        self.appends += 1
+        if self.appends % expire_every == 0:
+            self.expire()
+
+    def count(self, session_id):
+        return self.connections.get().execute('SELECT COUNT(*) FROM history WHERE session_id = ?', (session_id,)).fetchone()[0]
+
+    def page(self, session_id, offset, limit):
+        columns = ', '.join(f'"{column}"' for column in history_columns)
+        cursor = self.connections.get().execute(
+            f'SELECT {columns} FROM history WHERE session_id = ? ORDER BY seq LIMIT ? OFFSET ?',
+            (session_id, limit, offset),
+        )
+        return [list(row) for row in cursor]
+
+    def query(self, session_id, offset, limit, filters=(), sort_by=()):
+        # * one page of the filtered, sorted history and the number of rows matching the filters
+        where, params = ['session_id = ?'], [session_id]
+        for column, operator, target in filters:
+            if operator == 'contains':
+                where.append(f'instr("{column}", ?) > 0')
+                params.append(str(target))
+            elif operator == 'datestartswith':
+                where.append(f'substr("{column}", 1, ?) = ?')
+                params.extend([len(str(target)), str(target)])
+            elif column in numeric_columns and isinstance(target, float):
+                where.append(f'CAST("{column}" AS REAL) {sql_operators[operator]} ?')
+                params.append(target)
+            else:
+                where.append(f'"{column}" {sql_operators[operator]} ?')
+                params.append(str(target))
+        order = [
+            (f'CAST("{column}" AS REAL)' if column in numeric_columns else f'"{column}"') + (' DESC' if descending else '')
+            for column, descending in sort_by
+        ] + ['seq']
+        conn = self.connections.get()
+        where_sql = ' AND '.join(where)
+        total = conn.execute(f'SELECT COUNT(*) FROM history WHERE {where_sql}', params).fetchone()[0]
+        columns = ', '.join(f'"{column}"' for column in history_columns)
+        cursor = conn.execute(
+            f'SELECT {columns} FROM history WHERE {where_sql} ORDER BY {", ".join(order)} LIMIT ? OFFSET ?',
+            params + [limit, offset],
+        )
+        return [list(row) for row in cursor], total
+
+    def iter_rows(self, session_id, batch_size=1000):
+        columns = ', '.join(f'"{column}"' for column in history_columns)
+        cursor = self.connections.get().execute(
+            f'SELECT {columns} FROM history WHERE session_id = ? ORDER BY seq', (session_id,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield list(row)
+
+    def detach(self, session_id):
+        # * moves the rows to a new session id and returns it, the original session starts empty
+        export_id = new_session_id()
+        self.connections.get().execute('UPDATE history SET session_id = ? WHERE session_id = ?', (export_id, session_id))
+        return export_id
+
+    def clear(self, session_id):
+        self.connections.get().execute('DELETE FROM history WHERE session_id = ?', (session_id,))
+
+
+def create_store():
+    # * builds the store configured by the HISTORY_* environment variables
+    if history_backend == 'sqlite':
+        return SQLiteHistoryStore()
+    return MemoryHistoryStore()
+
+
+history_store = create_store()
+
+
+# -------------------------------------------------------------------------------------------------------
+# * history export
+# * GET /api/v1/history/<session_id>/export?format=csv|csv.gz|parquet streams the rows straight from
+# * the store, one block of export_batch_rows at a time, so memory stays flat however long the history is
+
+export_formats = {
+    'csv': ('text/csv', 'saved_user_inputs.csv'),
+    'csv.gz': ('application/gzip', 'saved_user_inputs.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'saved_user_inputs.parquet'),
+}
+
+
+def _row_batches(session_id):
+    batch = []
+    for row in history_store.iter_rows(session_id, export_batch_rows):
+        batch.append(row)
+        if len(batch) == export_batch_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_csv_stream(session_id):
+    # * same layout as the saved inputs file, header first
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(history_columns)
+    yield buffer.getvalue()
+    for batch in _row_batches(session_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    # file-like sink for the parquet writer, drained after every row group
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def export_parquet_stream(session_id):
+    # * one parquet row group per block, every column as text like the csv
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in history_columns])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _row_batches(session_id):
+            columns = [[None if value is None else str(value) for value in values] for values in zip(*batch)]
+            writer.write_table(pa.Table.from_arrays([pa.array(values, pa.string()) for values in columns], schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_stream(session_id, export_format):
+    if export_format == 'parquet':
+        return export_parquet_stream(session_id)
+    if export_format == 'csv.gz':
+        return gzip_stream(export_csv_stream(session_id))
+    return export_csv_stream(session_id)
+
+
+def export_url(session_id, export_format='csv', clear=False):
+    return f'/api/v1/history/{session_id}/export?format={export_format}' + ('&clear=1' if clear else '')
+
+
+def register_routes(server):
+    # * clear=1 drops the rows once the last block has been handed to the server (the Save button exports a
+    # * detached copy this way); an export that fails or is cut off keeps them, they expire with the TTL
+    @server.route('/api/v1/history/<session_id>/export', methods=['GET'])
+    def export_history(session_id):
+        export_format = request.args.get('format', 'csv')
+        if export_format not in export_formats:
+            return jsonify({'error': 'format must be one of: ' + ', '.join(export_formats)}), 400
+        clear = request.args.get('clear') == '1'
+        mimetype, filename = export_formats[export_format]
+
+        def generate():
+            yield from export_stream(session_id, export_format)
+            # only reached when every block was consumed, not on a disconnect (GeneratorExit) or an error
+            if clear:
+                history_store.clear(session_id)
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'},
+        )
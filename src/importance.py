@@ -0,0 +1,208 @@
+# Standard library imports
+import os
+from functools import lru_cache
+
+# Related third party imports for data manipulation
+import numpy as np
+import pandas as pd
+
+# Related third party imports for model persistence
+import joblib
+
+# Related third party imports for machine learning
+from sklearn.metrics import roc_auc_score
+
+# Third-party imports for visualization
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Third-party imports for web application
+from dash import dcc, html
+import dash_bootstrap_components as dbc
+
+# Local application/library specific imports
+import concurrency
+
+
+# -------------------------------------------------------------------------------------------------------
+# * global feature importance and partial dependence
+# * a build step scores the processed dataset once per (dataset, model) pair: permutation importance
+# * (drop in ROC AUC when one feature column is shuffled) and a 1-D partial dependence curve
+# * (mean leave probability with the feature set to each grid value) for every universal_features column;
+# * one process per feature, the results are a few small arrays in cache/importance/<figure cache key>.npz
+# * train.py builds the file for a new artifact before publishing it; otherwise the first process that
+# * misses builds it under figure_cache.build_lock while the other workers wait and load the file
+# * bpred, dataset and figure_cache are imported inside the functions so spawned workers stay light
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+importance_root = os.path.join(script_dir, 'cache', 'importance')
+
+# * IMPORTANCE_WORKERS processes for the build, one per CPU by default
+importance_workers = int(os.environ.get('IMPORTANCE_WORKERS', os.cpu_count() or 1))
+
+# shuffles per feature, the spread is shown as error bars
+n_repeats = 10
+
+# features with more distinct values than this get a grid of quantiles (5th to 95th percentile)
+max_grid_points = 50
+
+# model and processed dataset, set in each worker by _init_worker
+_worker_data = {}
+
+
+def importance_path(model_sha256=None):
+    import figure_cache
+    os.makedirs(importance_root, exist_ok=True)
+    return os.path.join(importance_root, f'{figure_cache.cache_key(model_sha256)}.npz')
+
+
+def feature_grid(values):
+    uniques = np.unique(values)
+    if len(uniques) <= max_grid_points:
+        return uniques.astype(np.float64)
+    return np.unique(np.quantile(values, np.linspace(0.05, 0.95, max_grid_points), method='nearest')).astype(np.float64)
+
+
+def _init_worker(x, y, model_path, feature_names):
+    _worker_data['x'] = x
+    _worker_data['y'] = y
+    _worker_data['model'] = joblib.load(model_path)
+    _worker_data['feature_names'] = feature_names
+
+
+def _leave_proba(x):
+    model = _worker_data['model']
+    proba = model.predict_proba(pd.DataFrame(x, columns=_worker_data['feature_names']))
+    return proba[:, list(model.classes_).index(1)]
+
+
+def _score_feature(column):
+    # * runs in a worker: importance samples and the partial dependence curve of one feature
+    x, y = _worker_data['x'], _worker_data['y']
+    baseline = roc_auc_score(y, _leave_proba(x))
+
+    # fixed seed per feature, the stored result does not depend on the process that computed it
+    rng = np.random.default_rng(column)
+    shuffled = x.copy()
+    drops = np.empty(n_repeats, dtype=np.float64)
+    for repeat in range(n_repeats):
+        shuffled[:, column] = rng.permutation(x[:, column])
+        drops[repeat] = baseline - roc_auc_score(y, _leave_proba(shuffled))
+
+    # every grid value for every row in one predict_proba call
+    grid = feature_grid(x[:, column])
+    stacked = np.tile(x, (len(grid), 1))
+    stacked[:, column] = np.repeat(grid, len(x))
+    dependence = _leave_proba(stacked).reshape(len(grid), len(x)).mean(axis=1)
+    return baseline, drops, grid, dependence
+
+
+def build_importance(model_path=None):
+    # * the arrays stored in the npz file, computed with a process pool over the features
+    # * for the joblib file at model_path, the current model by default
+    import bpred as bd
+    import dataset
+    df = dataset.load_processed()
+    x = df[bd.universal_features].to_numpy(dtype=np.float64)
+    y = df[bd.universal_target].to_numpy()
+    columns = range(len(bd.universal_features))
+    with concurrency.spawn_pool(importance_workers, initializer=_init_worker,
+                                initargs=(x, y, model_path or bd.file_path, bd.universal_features)) as pool:
+        results = list(pool.map(_score_feature, columns))
+
+    grids = [grid for _, _, grid, _ in results]
+    return {
+        'features': np.array(bd.universal_features),
+        'baseline_auc': np.array(results[0][0]),
+        'importances': np.stack([drops for _, drops, _, _ in results]),     # (features, n_repeats)
+        'pdp_grid': np.concatenate(grids),
+        'pdp_value': np.concatenate([dependence for _, _, _, dependence in results]),
+        'pdp_bounds': np.cumsum([0] + [len(grid) for grid in grids]),       # feature i is [bounds[i], bounds[i + 1])
+    }
+
+
+def read_importance(path):
+    try:
+        with np.load(path) as stored:
+            return {name: stored[name] for name in stored.files}
+    except (OSError, ValueError):
+        return None
+
+
+def load_importance(model_path=None, model_sha256=None):
+    # * the stored arrays of a model (the current one by default), built and written atomically on a miss;
+    # * one process on the host builds, the others wait for the lock and read its file
+    import figure_cache
+    path = importance_path(model_sha256)
+    arrays = read_importance(path)
+    if arrays is not None:
+        return arrays
+    with figure_cache.build_lock(path):
+        arrays = read_importance(path)
+        if arrays is not None:
+            return arrays
+        arrays = build_importance(model_path)
+        try:
+            tmp_path = f'{path[:-len(".npz")]}.{os.getpid()}.tmp.npz'
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    return arrays
+
+
+def build_importance_figures(arrays):
+    features = [str(feature) for feature in arrays['features']]
+    mean = arrays['importances'].mean(axis=1)
+    std = arrays['importances'].std(axis=1)
+    order = np.argsort(mean)
+
+    importance_fig = go.Figure(go.Bar(
+        x=mean[order], y=[features[i] for i in order], orientation='h',
+        error_x=dict(type='data', array=std[order]),
+    ))
+    importance_fig.update_layout(
+        title=f'Permutation importance (drop in ROC AUC, baseline {float(arrays["baseline_auc"]):.3f})',
+        xaxis_title='ROC AUC drop when shuffled',
+        height=500,
+    )
+
+    n_cols = 3
+    n_rows = -(-len(features) // n_cols)
+    pdp_fig = make_subplots(rows=n_rows, cols=n_cols, subplot_titles=features, vertical_spacing=0.06)
+    bounds = arrays['pdp_bounds']
+    for i, feature in enumerate(features):
+        grid = arrays['pdp_grid'][bounds[i]:bounds[i + 1]]
+        value = arrays['pdp_value'][bounds[i]:bounds[i + 1]]
+        pdp_fig.add_trace(
+            go.Scatter(x=grid, y=value, mode='lines+markers' if len(grid) <= 10 else 'lines', name=feature, showlegend=False),
+            row=i // n_cols + 1, col=i % n_cols + 1,
+        )
+    pdp_fig.update_yaxes(range=[0, 1])
+    pdp_fig.update_layout(title='Partial dependence: mean predicted probability of leaving', height=260 * n_rows)
+    return importance_fig, pdp_fig
+
+
+@lru_cache(maxsize=None)
+def importance_container():
+    importance_fig, pdp_fig = build_importance_figures(load_importance())
+    return dbc.Container(
+        [
+            html.Hr(),
+            html.H3('Model Explainability'),
+            html.P('How much the model relies on each feature across the whole dataset, and how the predicted '
+                   'probability of leaving moves with it. Computed once per model.'),
+            dcc.Graph(figure=importance_fig),
+            dcc.Graph(figure=pdp_fig),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    # * build step: python importance.py computes the tables for the current dataset and model
+    import time
+    started = time.perf_counter()
+    arrays = load_importance()
+    print(f'{importance_path()} ready in {time.perf_counter() - started:.2f} s')
+    for feature, drops in sorted(zip(arrays['features'], arrays['importances']), key=lambda item: -item[1].mean()):
+        print(f'{feature:28s} {drops.mean():.4f} +/- {drops.std():.4f}')
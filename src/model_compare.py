@@ -0,0 +1,182 @@
+# Standard library imports
+import json
+import os
+
+# Related third party imports for model persistence
+import joblib
+
+# Related third party imports for machine learning
+from sklearn.metrics import roc_curve, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+# Third-party imports for machine learning models; used for AUROC Curve
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.neural_network import MLPClassifier
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+
+# Local application/library specific imports
+import concurrency
+
+
+# -------------------------------------------------------------------------------------------------------
+# * offline model comparison for the AUROC tab
+# * the candidate models are fitted in parallel processes and their ROC curves and fitted
+# * estimators are stored under cache/model_compare/<dataset hash>/; they do not depend on the
+# * Random Forest, so a model reload only scores the new forest on the test split (random_forest_curve)
+# * bpred, dataset and figure_cache are imported inside the functions so spawned workers stay light
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+cache_root = os.path.join(script_dir, 'cache', 'model_compare')
+
+random_state = 42
+
+
+def candidate_models():
+    # * Random Forest is not listed here since it's pre-trained, see run_comparison
+    return {
+        'Decision Tree': DecisionTreeClassifier(random_state=random_state),
+        'KNN': KNeighborsClassifier(),
+        'SVC': SVC(probability=True, random_state=random_state),
+        'MLP': MLPClassifier(random_state=random_state),
+        'LDA': LinearDiscriminantAnalysis()
+    }
+
+
+def roc_from_scores(y_test, y_score):
+    fpr, tpr, _ = roc_curve(y_test, y_score)
+    auc = roc_auc_score(y_test, y_score)
+    return {'fpr': fpr.tolist(), 'tpr': tpr.tolist(), 'auc': float(auc)}
+
+
+def fit_and_score(name, model, x_train, y_train, x_test, y_test):
+    # * runs in a worker process; returns the fitted model so it can be stored with its curve
+    model.fit(x_train, y_train)
+    if hasattr(model, "predict_proba"):
+        y_score = model.predict_proba(x_test)[:, 1]
+    else:
+        y_score = model.decision_function(x_test)
+    return name, model, roc_from_scores(y_test, y_score)
+
+
+def split(x, y):
+    # * the seeded train/test split every curve is computed on, as plain arrays
+    x_train, x_test, y_train, y_test = train_test_split(x, y, train_size=0.8, random_state=random_state)
+    return x_train.to_numpy(), x_test.to_numpy(), y_train.to_numpy(), y_test.to_numpy()
+
+
+def run_comparison(x, y, max_workers=None):
+    # * fits every candidate on the same seeded split, one process per model
+    # plain arrays pickle cheaply to the worker processes
+    x_train, x_test, y_train, y_test = split(x, y)
+
+    models = candidate_models()
+    if max_workers is None:
+        max_workers = min(len(models), os.cpu_count() or 1)
+
+    curves = {}
+    estimators = {}
+    with concurrency.spawn_pool(max_workers) as executor:
+        futures = [executor.submit(fit_and_score, name, model, x_train, y_train, x_test, y_test)
+                   for name, model in models.items()]
+        for future in futures:
+            name, fitted, curve = future.result()
+            estimators[name] = fitted
+            curves[name] = curve
+
+    return curves, estimators
+
+
+def random_forest_curve(x, y, model=None):
+    # * ROC curve of the pre-trained Random Forest (the current model by default) on the same test split
+    import bpred as bd
+    if model is None:
+        model = bd.model_registry.current
+    _, x_test, _, y_test = split(x, y)
+    return roc_from_scores(y_test, bd.predict_proba_matrix(x_test, model)[:, model.leave_class_index])
+
+
+def results_dir():
+    import dataset
+    return os.path.join(cache_root, dataset.dataset_sha256()[:16])
+
+
+def save_results(curves, estimators, path):
+    os.makedirs(path, exist_ok=True)
+    tmp_suffix = f'.{os.getpid()}.tmp'
+
+    estimators_path = os.path.join(path, 'estimators.joblib')
+    joblib.dump(estimators, estimators_path + tmp_suffix)
+    os.replace(estimators_path + tmp_suffix, estimators_path)
+
+    # curves are written last, their presence marks a complete run
+    curves_path = os.path.join(path, 'roc_curves.json')
+    with open(curves_path + tmp_suffix, 'w', encoding='utf-8') as f:
+        json.dump(curves, f)
+    os.replace(curves_path + tmp_suffix, curves_path)
+
+
+def read_curves(path):
+    try:
+        with open(os.path.join(path, 'roc_curves.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_candidate_curves(x, y):
+    # * the stored candidate curves, running the comparison job only if nothing is stored;
+    # * one process on the host runs it, the others wait for the lock and read its results
+    import figure_cache
+    path = results_dir()
+    curves = read_curves(path)
+    if curves is not None:
+        return curves
+    with figure_cache.build_lock(path):
+        curves = read_curves(path)
+        if curves is not None:
+            return curves
+        curves, estimators = run_comparison(x, y)
+        try:
+            save_results(curves, estimators, path)
+        except OSError:
+            pass
+    return curves
+
+
+def load_roc_curves(model=None):
+    # * returns {model name: {'fpr', 'tpr', 'auc'}}: the stored candidates plus the Random Forest
+    import bpred as bd
+    import dataset
+    df = dataset.load_processed()
+    x, y = df[bd.universal_features], df[bd.universal_target]
+    curves = load_candidate_curves(x, y)
+    curves['Random Forest'] = random_forest_curve(x, y, model)
+    return curves
+
+
+def load_estimators():
+    # * the fitted comparison models, e.g. for inspecting them offline
+    return joblib.load(os.path.join(results_dir(), 'estimators.joblib'))
+
+
+if __name__ == "__main__":
+    # * offline job: python model_compare.py refits the candidates and stores the results
+    import bpred as bd
+    import dataset
+    df = dataset.load_processed()
+    x, y = df[bd.universal_features], df[bd.universal_target]
+    curves, estimators = run_comparison(x, y)
+    save_results(curves, estimators, results_dir())
+    # reported here only, run_comparison also runs inside web workers (auroc_container)
+    curves['Random Forest'] = random_forest_curve(x, y)
+    for name, curve in curves.items():
+        print(f'{name} model AUC: {curve["auc"]:.3f}')
+
+    # the cached AUROC figure was drawn from the previous curves
+    import figure_cache
+    stale_figure = os.path.join(figure_cache.cache_dir(), 'auroc.json')
+    if os.path.exists(stale_figure):
+        os.remove(stale_figure)
+    print(f'model comparison saved: {results_dir()}')
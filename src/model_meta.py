@@ -0,0 +1,163 @@
+# Standard library imports
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+# Related third party imports for data manipulation
+import numpy as np
+import pandas as pd
+
+# Related third party imports for machine learning
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, brier_score_loss, precision_recall_fscore_support
+from sklearn.model_selection import train_test_split
+
+
+# -------------------------------------------------------------------------------------------------------
+# * model metadata
+# * evaluation numbers that never change for a given model file are computed once and stored in a
+# * sidecar json next to the joblib artifact, e.g. rf_model_4.0.5_NOPARAM.meta.json
+# * a calibration map is only fitted for models whose held-out rows are known: train.py writes the test
+# * split it kept away from the forest next to the artifact (holdout.feather); the bundled joblib was
+# * trained on the rows bpred evaluates it on, so its sidecar has no calibration and its scores are in-sample
+
+# bumped whenever compute_metadata gains fields, sidecars of an older format are rebuilt
+metadata_format = 3
+
+random_state = 42
+
+def file_sha256(path):
+    # * content hash of a file, used to tell whether a sidecar still belongs to its artifact
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def metadata_path(model_path):
+    return os.path.splitext(model_path)[0] + '.meta.json'
+
+
+def holdout_path(model_path):
+    return os.path.join(os.path.dirname(model_path), 'holdout.feather')
+
+
+def save_holdout(x_test, y_test, model_path):
+    # * the rows the model was not trained on, features then the target as the last column
+    frame = x_test.copy()
+    frame[y_test.name] = y_test
+    frame.reset_index(drop=True).to_feather(holdout_path(model_path))
+
+
+def load_holdout(model_path):
+    # * (x_test, y_test) written by save_holdout
+    frame = pd.read_feather(holdout_path(model_path))
+    return frame.iloc[:, :-1], frame.iloc[:, -1]
+
+
+def fit_calibration(leave_proba, y_leave):
+    # * Platt scaling of the leave probability: calibrated = 1 / (1 + exp(-(a * p + b)))
+    # * a two-parameter sigmoid rather than isotonic regression, the test split only has a few hundred rows;
+    # * fitted on one stratified half of the held-out rows, the Brier scores come from the other half
+    leave_proba = np.asarray(leave_proba, dtype=np.float64)
+    y_leave = np.asarray(y_leave)
+    fit_rows, eval_rows = train_test_split(np.arange(len(y_leave)), train_size=0.5, stratify=y_leave,
+                                           random_state=random_state)
+    platt = LogisticRegression(C=1e6).fit(leave_proba[fit_rows].reshape(-1, 1), y_leave[fit_rows])
+    calibration = {'method': 'sigmoid', 'a': float(platt.coef_[0, 0]), 'b': float(platt.intercept_[0])}
+    calibration['n_fit'] = int(len(fit_rows))
+    calibration['n_eval'] = int(len(eval_rows))
+    calibration['brier_raw'] = float(brier_score_loss(y_leave[eval_rows], leave_proba[eval_rows]))
+    calibration['brier_calibrated'] = float(brier_score_loss(
+        y_leave[eval_rows], apply_calibration(calibration, leave_proba[eval_rows])))
+    return calibration
+
+
+def apply_calibration(calibration, leave_proba):
+    # * calibrated leave probability for one value or an array of them
+    return 1.0 / (1.0 + np.exp(-(calibration['a'] * np.asarray(leave_proba, dtype=np.float64) + calibration['b'])))
+
+
+def compute_metadata(model, x_test, y_test, model_sha256, data_sha256=None, held_out=False):
+    # * scores the test split a single time and keeps overall and per-class metrics,
+    # * plus the calibration map for the leave probability when the rows are held out (None otherwise)
+    proba = model.predict_proba(x_test)
+    y_pred = model.classes_.take(proba.argmax(axis=1))
+    labels = list(model.classes_)
+    precision, recall, f1, support = precision_recall_fscore_support(y_test, y_pred, labels=labels, zero_division=0)
+
+    per_class = {}
+    for i, label in enumerate(labels):
+        per_class[str(int(label))] = {
+            'precision': float(precision[i]),
+            'recall': float(recall[i]),
+            'f1': float(f1[i]),
+            'support': int(support[i]),
+        }
+
+    calibration = None
+    if held_out:
+        y_leave = (np.asarray(y_test) == 1).astype(int)
+        calibration = fit_calibration(proba[:, labels.index(1)], y_leave)
+
+    return {
+        'format': metadata_format,
+        'model_sha256': model_sha256,
+        'data_sha256': data_sha256,
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'per_class': per_class,
+        'n_test': int(len(y_test)),
+        'held_out': held_out,
+        'calibration': calibration,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def save_metadata(metadata, path):
+    # * write to a temp file first so concurrent workers never read a half-written sidecar
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_metadata(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_or_build_metadata(get_model, model_path, get_test_split, data_sha256=None):
+    # * returns the sidecar if it matches the model file and dataset, otherwise scores the model and rewrites it
+    # * get_model and get_test_split are only called on a miss so a warm start never touches the model or the test data;
+    # * an artifact with a holdout file is scored on those rows instead of get_test_split's
+    model_sha256 = file_sha256(model_path)
+    path = metadata_path(model_path)
+    held_out = os.path.exists(holdout_path(model_path))
+    if held_out:
+        data_sha256 = file_sha256(holdout_path(model_path))
+        get_test_split = lambda: load_holdout(model_path)
+
+    metadata = read_metadata(path)
+    if (metadata is not None and metadata.get('format') == metadata_format
+            and metadata.get('model_sha256') == model_sha256 and metadata.get('data_sha256') == data_sha256):
+        return metadata
+
+    x_test, y_test = get_test_split()
+    metadata = compute_metadata(get_model(), x_test, y_test, model_sha256, data_sha256, held_out)
+    try:
+        save_metadata(metadata, path)
+    except OSError:
+        # read-only deploys still get the in-memory copy
+        pass
+    return metadata
+
+
+if __name__ == "__main__":
+    # * build step: python model_meta.py writes the sidecar for the bundled model if it is missing or stale
+    import bpred
+    print(json.dumps(bpred.model_metadata, indent=2))
@@ -0,0 +1,96 @@
+# Standard library imports
+import os
+import shutil
+
+# Local application/library specific imports
+import explain
+import forest
+
+
+# -------------------------------------------------------------------------------------------------------
+# * model store
+# * the compiled forest of a joblib model is written once to cache/model_store/<model sha256>-v<format>/ as
+# * uncompressed .npy arrays and memory-mapped from there, instead of every worker unpickling the
+# * joblib file into its own copy of the trees
+# * the TreeSHAP path tables (explain.py) sit next to it in cache/model_store/<model sha256>-v<format>-paths/
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+store_root = os.path.join(script_dir, 'cache', 'model_store')
+
+# * bumped when the compiled layout or its values change, so stores written by older code are rebuilt
+# * (2: leaf values copied from tree_.value without renormalising)
+store_format = 2
+
+
+def store_dir(model_sha256):
+    return os.path.join(store_root, f'{model_sha256[:16]}-v{store_format}')
+
+
+def build_store(model, model_sha256, x):
+    # * compiles the sklearn model and writes it into a temporary directory that is renamed into place,
+    # * so a worker never sees a half-written store; a compiled forest that differs from the sklearn
+    # * model on x raises forest.CompiledForestMismatch and is never written
+    path = store_dir(model_sha256)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    forest.compile_checked(model, x).save(tmp_path)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # another process finished first, its copy is identical
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+def load_or_build_compiled(model_sha256, get_model, get_x):
+    # * memory-mapped CompiledForest for the model; get_model() and get_x() (the rows the compiled
+    # * forest is checked on) are only called when the store is missing
+    path = store_dir(model_sha256)
+    try:
+        return forest.CompiledForest.load(path)
+    except (OSError, ValueError):
+        pass
+    try:
+        build_store(get_model(), model_sha256, get_x())
+        return forest.CompiledForest.load(path)
+    except OSError:
+        # read-only deploys compile in memory instead
+        return forest.compile_checked(get_model(), get_x())
+
+
+def explainer_dir(model_sha256):
+    return store_dir(model_sha256) + '-paths'
+
+
+def build_explainer_store(model, model_sha256):
+    # * same temporary directory and rename as build_store
+    path = explainer_dir(model_sha256)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    explain.PathExplainer.from_sklearn(model).save(tmp_path)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+def load_or_build_explainer(model_sha256, get_model):
+    # * memory-mapped PathExplainer for the model, get_model() is only called when the store is missing
+    path = explainer_dir(model_sha256)
+    try:
+        return explain.PathExplainer.load(path)
+    except (OSError, ValueError):
+        pass
+    try:
+        build_explainer_store(get_model(), model_sha256)
+        return explain.PathExplainer.load(path)
+    except OSError:
+        return explain.PathExplainer.from_sklearn(get_model())
+
+
+if __name__ == "__main__":
+    # * build step: python model_store.py writes the store for the bundled model if it is missing
+    import bpred
+    print(store_dir(bpred.model_sha256))
+    print(explainer_dir(bpred.model_sha256))
@@ -0,0 +1,193 @@
+# Standard library imports
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Related third party imports for data manipulation
+import numpy as np
+
+# Local application/library specific imports
+import concurrency
+
+
+# -------------------------------------------------------------------------------------------------------
+# * prediction cache
+# * predict_proba rows keyed on (model version, encoded feature vector)
+# * an in-process LRU with TTL sits in front of an optional SQLite file that every gunicorn worker
+# * on the machine can read and write, so a form one worker scored is a hit in the others
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# * PREDICTION_CACHE_BACKEND=sqlite turns on the shared file, memory only by default
+cache_backend = os.environ.get('PREDICTION_CACHE_BACKEND', 'memory')
+cache_db_path = os.environ.get('PREDICTION_CACHE_DB', os.path.join(script_dir, 'cache', 'predictions.sqlite3'))
+cache_max_entries = int(os.environ.get('PREDICTION_CACHE_MAX_ENTRIES', 10000))
+cache_ttl_s = float(os.environ.get('PREDICTION_CACHE_TTL_S', 24 * 3600))
+
+# * the shared file drops expired rows and trims itself to max_entries every prune_every writes of a process
+prune_every = 100
+
+
+def feature_key(row):
+    # * the model sees float32 values, so '1', 1 and 1.0 all normalise to the same key
+    return np.asarray(row, dtype=np.float32).tobytes()
+
+
+class SQLiteBackend:
+    # * one row per (model_version, key); workers pick up a new model at different times, so rows of
+    # * other versions are left alone here and age out with prune(): expired rows and the rows beyond
+    # * max_entries (soonest to expire first, an old version's rows are no longer refreshed) are deleted
+    def __init__(self, path, model_version, max_entries=cache_max_entries):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        # per thread and per process, see concurrency.py
+        self.connections = concurrency.SQLiteConnections(path, timeout=1.0)
+        self.writes = 0
+        conn = self.connections.get()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS predictions ('
+            ' model_version TEXT NOT NULL, key BLOB NOT NULL, proba BLOB NOT NULL, expires REAL NOT NULL,'
+            ' PRIMARY KEY (model_version, key))'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS predictions_expires ON predictions (expires)')
+        self.set_model_version(model_version)
+        self.prune()
+
+    def set_model_version(self, model_version):
+        # reads and writes use this version from now on, the other versions' rows stay for their workers
+        self.model_version = model_version
+
+    def get(self, key, now):
+        row = self.connections.get().execute(
+            'SELECT proba FROM predictions WHERE model_version = ? AND key = ? AND expires > ?',
+            (self.model_version, key, now),
+        ).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float64)
+
+    def put(self, key, proba, expires):
+        try:
+            self.connections.get().execute(
+                'INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)',
+                (self.model_version, key, np.asarray(proba, dtype=np.float64).tobytes(), expires),
+            )
+        except sqlite3.OperationalError:
+            # another worker holds the write lock, the entry is simply not shared this time
+            return
+        self.writes += 1
+        if self.writes % prune_every == 0:
+            self.prune()
+
+    def prune(self, now=None):
+        # * deletes expired rows, then the rows that expire soonest until max_entries are left
+        now = time.time() if now is None else now
+        try:
+            conn = self.connections.get()
+            conn.execute('DELETE FROM predictions WHERE expires <= ?', (now,))
+            conn.execute(
+                'DELETE FROM predictions WHERE rowid IN ('
+                ' SELECT rowid FROM predictions ORDER BY expires DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+        except sqlite3.OperationalError:
+            # busy, the next prune catches up
+            pass
+
+    def clear(self):
+        self.connections.get().execute('DELETE FROM predictions')
+
+
+class PredictionCache:
+    def __init__(self, model_version, max_entries=cache_max_entries, ttl_s=cache_ttl_s, backend=None):
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.backend = backend
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, row, model_version=None):
+        # * cached predict_proba row for the encoded feature vector, or None
+        # * model_version is the model the caller scores with; a miss while the cache still holds another model's rows
+        key = feature_key(row)
+        now = time.time()
+        with self.lock:
+            if model_version is not None and model_version != self.model_version:
+                self.misses += 1
+                return None
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+
+        proba = self.backend.get(key, now) if self.backend is not None else None
+        with self.lock:
+            if proba is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, proba, now + self.ttl_s)
+        return proba
+
+    def put(self, row, proba, model_version=None):
+        # * a row scored by another model than the cache's (during a model swap) is not stored
+        key = feature_key(row)
+        expires = time.time() + self.ttl_s
+        with self.lock:
+            if model_version is not None and model_version != self.model_version:
+                return
+            self._store(key, proba, expires)
+        if self.backend is not None:
+            self.backend.put(key, proba, expires)
+
+    def _store(self, key, proba, expires):
+        self.entries[key] = (proba, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def set_model_version(self, model_version):
+        # * a different model makes every cached prediction stale
+        with self.lock:
+            if model_version == self.model_version:
+                return
+            self.model_version = model_version
+            self.entries.clear()
+        if self.backend is not None:
+            self.backend.set_model_version(model_version)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'model_version': self.model_version,
+                'backend': 'sqlite' if self.backend is not None else 'memory',
+                'size': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl_s,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+def create_cache(model_version):
+    # * builds the cache configured by the PREDICTION_CACHE_* environment variables
+    backend = None
+    if cache_backend == 'sqlite':
+        backend = SQLiteBackend(cache_db_path, model_version, max_entries=cache_max_entries)
+    return PredictionCache(model_version, backend=backend)
@@ -0,0 +1,255 @@
+# Standard library imports
+import hashlib
+import heapq
+import io
+import os
+from functools import lru_cache
+
+# Related third party imports for data manipulation
+import numpy as np
+import pandas as pd
+
+# Third-party imports for web application
+from dash import dash_table, dcc, html
+import dash_bootstrap_components as dbc
+
+# Local application/library specific imports
+import batch
+import bpred as bd
+import dataset
+import figure_cache
+
+
+# -------------------------------------------------------------------------------------------------------
+# * attrition risk ranking
+# * every employee of the processed dataset (or of an uploaded roster) is scored once per model and the
+# * scores are stored under cache/scores/<figure cache key>/; the ranking tab filters and takes the
+# * top N from that table without running the forest again
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+scores_root = os.path.join(script_dir, 'cache', 'scores')
+
+default_top_n = 25
+
+# * columns of a score table, Employee is the 1-based row of the dataset or roster
+score_columns = ['Employee', 'AgeGroup', 'JobLevel', 'OverTime', 'MonthlyIncome', 'YearsAtCompany',
+                 'TotalWorkingYears', 'YearsSinceLastPromotion', 'LeaveProbability', 'CalibratedLeaveProbability']
+
+# * columns the tab filters on, each gets a per-value index when a table is loaded
+filter_columns = ['JobLevel', 'OverTime', 'AgeGroup']
+
+# * one-hot (Age_group_Young_Adults, Age_group_Adults) -> age group name
+age_group_names = {tuple(one_hot): bd.orig_name_gg_mapping[code] for code, one_hot in bd.age_mapping.items()}
+
+feature_index = {feature: i for i, feature in enumerate(bd.universal_features)}
+
+
+def scores_dir():
+    path = os.path.join(scores_root, figure_cache.cache_key())
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def build_score_frame(x, employee):
+    # * scores an encoded universal_features matrix in one call and returns the score table
+    x = np.asarray(x, dtype=np.float64)
+    model = bd.model_registry.current
+    proba = bd.predict_proba_matrix(x, model)[:, model.leave_class_index] if len(x) else np.empty(0)
+    calibrated = bd.calibrate(proba, model) if model.calibration is not None else np.full(len(proba), np.nan)
+
+    one_hot = x[:, [feature_index['Age_group_Young_Adults'], feature_index['Age_group_Adults']]].astype(int)
+    frame = pd.DataFrame({
+        'Employee': np.asarray(employee, dtype=np.int64),
+        'AgeGroup': [age_group_names.get(tuple(pair), '') for pair in one_hot.tolist()],
+        'JobLevel': x[:, feature_index['JobLevel']].astype(np.int64),
+        'OverTime': x[:, feature_index['OverTime_Yes']].astype(np.int64),
+        'MonthlyIncome': x[:, feature_index['MonthlyIncome']].astype(np.int64),
+        'YearsAtCompany': x[:, feature_index['YearsAtCompany']].astype(np.int64),
+        'TotalWorkingYears': x[:, feature_index['TotalWorkingYears']].astype(np.int64),
+        'YearsSinceLastPromotion': x[:, feature_index['YearsSinceLastPromotion']].astype(np.int64),
+        'LeaveProbability': np.round(proba, 4),
+        'CalibratedLeaveProbability': np.round(calibrated, 4),
+    })
+    return frame[score_columns]
+
+
+def load_score_frame(name, builder):
+    # * feather file under scores_dir(), built with builder() on a miss
+    path = os.path.join(scores_dir(), f'{name}.feather')
+    try:
+        return pd.read_feather(path)
+    except (OSError, ValueError):
+        pass
+    frame = builder()
+    try:
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        frame.to_feather(tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return frame
+
+
+class ScoreTable:
+    # * a score table with a boolean mask per (filter column, value), so a filter is a few numpy ors and ands
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self.proba = self.frame['LeaveProbability'].to_numpy()
+        self.index = {
+            column: {value: (self.frame[column] == value).to_numpy() for value in self.frame[column].unique().tolist()}
+            for column in filter_columns
+        }
+
+    def options(self, column):
+        return sorted(self.index[column])
+
+    def positions(self, filters):
+        # * rows matching every filter, filters maps a column to the accepted values (empty = any)
+        mask = np.ones(len(self.frame), dtype=bool)
+        for column, values in filters.items():
+            if not values:
+                continue
+            accepted = np.zeros(len(self.frame), dtype=bool)
+            for value in values:
+                accepted |= self.index[column].get(value, False)
+            mask &= accepted
+        return np.flatnonzero(mask)
+
+    def top_n(self, n, filters):
+        # * heap-based partial sort: the n highest leave probabilities among the matching rows,
+        # * O(rows * log n) instead of sorting every row; ties keep the lower Employee first
+        proba = self.proba
+        top = heapq.nlargest(n, self.positions(filters).tolist(), key=lambda i: (proba[i], -i))
+        return self.frame.iloc[top]
+
+
+@lru_cache(maxsize=None)
+def dataset_score_table():
+    # * the processed dataset, scored once per dataset and model
+    def builder():
+        df = dataset.load_processed()
+        return build_score_frame(df[bd.universal_features].to_numpy(), np.arange(1, len(df) + 1))
+    return ScoreTable(load_score_frame('dataset', builder))
+
+
+def roster_key(content):
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def score_roster(content):
+    # * scores an uploaded csv in the saved inputs file layout and returns its key;
+    # * rows that cannot be encoded are skipped, raises ValueError for a file with missing columns
+    key = roster_key(content)
+
+    def builder():
+        frames = []
+        offset = 1
+        for chunk in batch.read_chunks(io.BytesIO(content)):
+            x, valid, _ = batch.encode_chunk(chunk)
+            employee = np.arange(offset, offset + len(chunk))
+            frames.append(build_score_frame(x[valid], employee[valid]))
+            offset += len(chunk)
+        return pd.concat(frames, ignore_index=True)
+
+    load_score_frame(f'roster-{key}', builder)
+    return key
+
+
+@lru_cache(maxsize=16)
+def roster_score_table(key):
+    path = os.path.join(scores_dir(), f'roster-{key}.feather')
+    return ScoreTable(pd.read_feather(path))
+
+
+def score_table(source):
+    # * source is None for the dataset, or the key score_roster returned
+    if source is None:
+        return dataset_score_table()
+    try:
+        return roster_score_table(source)
+    except (OSError, ValueError):
+        # the roster was scored under another model or the cache was cleared
+        return None
+
+
+def filter_options(values):
+    return [{'label': str(value), 'value': value} for value in values]
+
+
+@lru_cache(maxsize=None)
+def ranking_container():
+    table = dataset_score_table()
+    return dbc.Container(
+        [
+            html.Hr(),
+            html.H3('Attrition Risk Ranking'),
+            html.P('Employees with the highest predicted probability of leaving. Scores are computed once per model; '
+                   'filters only select from the stored scores.'),
+            dcc.Store(id='ranking_source'),
+            dbc.Row(
+                [
+                    dbc.Col([dbc.Label('Job Level'), dcc.Dropdown(id='ranking_job_level', options=filter_options(table.options('JobLevel')), multi=True)], width=3),
+                    dbc.Col([dbc.Label('Over Time'), dcc.Dropdown(id='ranking_overtime', options=filter_options(table.options('OverTime')), multi=True)], width=2),
+                    dbc.Col([dbc.Label('Age Group'), dcc.Dropdown(id='ranking_age_group', options=filter_options(table.options('AgeGroup')), multi=True)], width=4),
+                    dbc.Col([dbc.Label('Top N'), dbc.Input(id='ranking_top_n', type='number', min=1, max=1000, step=1, value=default_top_n)], width=3),
+                ],
+                className='mb-3',
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Upload(
+                            id='ranking_upload',
+                            children=html.Div(['Rank your own roster: drag and drop or ', html.A('select a CSV file'), ' in the saved inputs file layout']),
+                            style={
+                                'borderWidth': '1px',
+                                'borderStyle': 'dashed',
+                                'borderRadius': '5px',
+                                'textAlign': 'center',
+                                'padding': '10px',
+                            },
+                        ),
+                        width=9,
+                    ),
+                    dbc.Col(dbc.Button('Use the dataset', id='ranking_use_dataset', n_clicks=0), width=3),
+                ],
+                className='mb-3',
+            ),
+            html.Div(id='ranking_status'),
+            html.Div(id='ranking_summary', className='mb-2'),
+            dash_table.DataTable(
+                id='ranking_table',
+                columns=[{'name': column, 'id': column} for column in score_columns],
+                page_size=25,
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': 'rgb(242, 242, 242)',
+                    }
+                ],
+                style_header={
+                    'backgroundColor': 'rgb(255, 255, 255)',
+                    'color': 'black',
+                    'border': '1px solid black',
+                    'fontWeight': 'bold',
+                },
+            ),
+        ]
+    )
+
+
+@bd.model_registry.on_swap
+def clear_score_tables(loaded):
+    # * the stored scores belong to the previous model, the next request scores again under the new cache key
+    dataset_score_table.cache_clear()
+    roster_score_table.cache_clear()
+    ranking_container.cache_clear()
+
+
+if __name__ == "__main__":
+    # * build step: python ranking.py scores the dataset for the current model
+    import time
+    started = time.perf_counter()
+    table = dataset_score_table()
+    print(f'{len(table.frame)} employees scored in {time.perf_counter() - started:.2f} s')
+    print(table.top_n(10, {}))
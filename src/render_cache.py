@@ -0,0 +1,143 @@
+# Standard library imports
+import hashlib
+import io
+import json
+import os
+import re
+from importlib.metadata import version
+
+# Related third party imports for data manipulation
+import pandas as pd
+
+# Third-party imports for web application
+from flask import abort, send_from_directory
+
+# Local application/library specific imports
+import concurrency
+
+
+# -------------------------------------------------------------------------------------------------------
+# * render cache
+# * the static seaborn plots (KDE, box, violin) are content addressed: the file name is a hash of the
+# * plotted data, the plot spec, the output format and the matplotlib/seaborn/pillow versions, so a
+# * file never changes once written and is only rendered when nothing with that name exists yet.
+# * Missing plots are rendered together, one spawned process each; a render writes a temporary file
+# * and renames it into place, so concurrent workers never see or clobber a half-written image.
+# * Files are served from /renders/ with a one year, immutable Cache-Control.
+# * matplotlib, seaborn and PIL are only imported by the render processes
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+render_root = os.path.join(script_dir, 'cache', 'renders')
+render_url_prefix = '/renders'
+
+# * RENDER_FORMAT=webp writes lossless WebP (smaller files), PNG by default
+render_format = os.environ.get('RENDER_FORMAT', 'png').lower()
+save_options = {
+    'png': {'format': 'PNG', 'optimize': True},
+    'webp': {'format': 'WEBP', 'lossless': True},
+}
+
+# * RENDER_WORKERS processes at most, one per missing plot by default
+render_workers = int(os.environ.get('RENDER_WORKERS', 3))
+
+cache_max_age_s = 365 * 24 * 3600
+
+target_column = 'Attrition_Yes'
+
+# * one entry per plot: a grid of subplots, one per column of the frame
+plot_specs = {
+    'kde_plot': {
+        'kind': 'kde', 'title': 'Univariate Analysis - Numerical Variables - KDE Plot',
+        'figsize': [12, 17], 'grid': [8, 4], 'crop_height': 1000, 'pad_top': 20,
+    },
+    'box_plot': {
+        'kind': 'box', 'title': 'Bivariate Analysis - Numerical Variables - Box Plot',
+        'figsize': [12, 17], 'grid': [8, 4], 'crop_height': 1000, 'pad_top': 20, 'legend_loc': 'center',
+    },
+    'violin_plot': {
+        'kind': 'violin', 'title': 'Bivariate Analysis - Numerical Variables - Violin Plot',
+        'figsize': [12, 17], 'grid': [8, 4], 'crop_height': 1000, 'pad_top': 20, 'legend_loc': 'upper right',
+    },
+}
+
+filename_pattern = re.compile(r'^[a-z_]+-[0-9a-f]{16}\.(png|webp)$')
+
+
+def render_filename(name, frame):
+    # * <plot name>-<hash of data, spec, format and renderer versions>.<format>
+    sha = hashlib.sha256()
+    sha.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    renderer = [version('matplotlib'), version('seaborn'), version('pillow')]
+    sha.update(json.dumps([name, plot_specs[name], list(frame.columns), render_format, renderer]).encode('utf-8'))
+    return f'{name}-{sha.hexdigest()[:16]}.{render_format}'
+
+
+def draw(spec, frame):
+    # * the figure as png bytes
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=spec['figsize'])
+    plt.suptitle(spec['title'], fontweight='bold', fontsize=15, y=1)
+    rows, cols = spec['grid']
+    for i, var in enumerate(frame, 1):
+        plt.subplot(rows, cols, i)
+        if spec['kind'] == 'kde':
+            sns.kdeplot(x=var, data=frame, fill=True, color='r')
+        elif spec['kind'] == 'box':
+            sns.boxplot(data=frame, x=target_column, y=var, hue=target_column,
+                        palette=['tab:blue', 'tab:orange'], fill=False, gap=.1)
+            plt.legend(fontsize=7, loc=spec['legend_loc'])
+        else:
+            sns.violinplot(data=frame, x=target_column, y=var, hue=target_column,
+                           palette=['tab:blue', 'tab:orange'], split=True)
+            plt.legend(fontsize=7, loc=spec['legend_loc'])
+        plt.tight_layout()
+
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png')
+    plt.close('all')
+    return buffer.getvalue()
+
+
+def render(name, frame, path):
+    # * runs in a render process: draws, crops the empty bottom rows, pads the top and writes path atomically
+    from PIL import Image, ImageOps
+
+    spec = plot_specs[name]
+    image = Image.open(io.BytesIO(draw(spec, frame)))
+    image = image.crop((0, 0, image.width, spec['crop_height']))
+    image = ImageOps.expand(image, border=(0, spec['pad_top'], 0, 0), fill='white')
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        image.save(tmp_path, **save_options[render_format])
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def load_renders(frame, names):
+    # * url of every named plot of frame, rendering the missing ones in parallel processes
+    os.makedirs(render_root, exist_ok=True)
+    paths = {name: os.path.join(render_root, render_filename(name, frame)) for name in names}
+    missing = [name for name in names if not os.path.exists(paths[name])]
+    if missing:
+        with concurrency.spawn_pool(min(len(missing), render_workers)) as pool:
+            list(pool.map(render, missing, [frame] * len(missing), [paths[name] for name in missing]))
+    return {name: f'{render_url_prefix}/{os.path.basename(path)}' for name, path in paths.items()}
+
+
+def register_routes(server):
+    # * a name always has the same content, browsers and proxies may keep it for a year
+    @server.route(f'{render_url_prefix}/<filename>')
+    def serve_render(filename):
+        if not filename_pattern.match(filename):
+            abort(404)
+        response = send_from_directory(render_root, filename, max_age=cache_max_age_s)
+        response.headers['Cache-Control'] = f'public, max-age={cache_max_age_s}, immutable'
+        return response
@@ -0,0 +1,80 @@
+# Standard library imports
+from functools import lru_cache
+
+# Related third party imports for data manipulation
+import numpy as np
+
+# Third-party imports for visualization
+import plotly.graph_objects as go
+
+# Local application/library specific imports
+import bpred as bd
+import cpf
+import dataset
+
+
+# -------------------------------------------------------------------------------------------------------
+# * what-if sweep
+# * one input of the prediction form is varied over its whole range while the others keep the form's
+# * values; all variants are encoded into one matrix and scored with a single predict_proba call
+
+# * points for the free number inputs, at or below bd.compiled_max_rows so the sweep stays on the compiled forest
+sweep_points = 100
+
+# * the select inputs of the form, swept over their options
+select_values = {
+    'EnvironmentSatisfaction'   : [0, 1, 2, 3, 4],
+    'JobSatisfaction'           : [0, 1, 2, 3, 4],
+    'RelationshipSatisfaction'  : [0, 1, 2, 3, 4],
+    'PerformanceRating'         : [0, 1, 2, 3, 4],
+    'WorkLifeBalance'           : [0, 1, 2, 3, 4],
+    'JobInvolvement'            : [0, 1, 2, 3, 4],
+    'JobLevel'                  : [0, 1, 2, 3, 4, 5],
+    'OverTime'                  : [0, 1, 2],
+}
+
+feature_index = {feature: i for i, feature in enumerate(bd.universal_features)}
+
+
+@lru_cache(maxsize=None)
+def sweep_values(field):
+    # * values a field is swept over: the select options, or 0 up to the largest value in the dataset
+    if field in select_values:
+        return np.array(select_values[field], dtype=np.float64)
+    if field not in bd.numeric_feature_map:
+        raise ValueError(f'{field} cannot be swept')
+    top = float(dataset.load_processed()[bd.numeric_feature_map[field]].max())
+    return np.unique(np.round(np.linspace(0.0, top, sweep_points)))
+
+
+def sweep(record, field, values=None):
+    # * leave probability (and calibrated leave probability, or None) of record with field set to each value
+    # * raises ValueError when the record itself cannot be encoded
+    values = sweep_values(field) if values is None else np.asarray(values, dtype=np.float64)
+    base = bd.feature_encoder.encode_one(record)
+    x = np.repeat(base, len(values), axis=0)
+    x[:, feature_index[bd.numeric_feature_map[field]]] = values
+    model = bd.model_registry.current
+    leave = bd.predict_proba_matrix(x, model)[:, model.leave_class_index]
+    return values, leave, bd.calibrate(leave, model)
+
+
+def build_sweep_figure(field, values, leave, calibrated, current=None):
+    label = cpf.field_labels.get(field, field)
+    fig = go.Figure()
+    line_shape = 'hv' if field in select_values else 'linear'
+    fig.add_trace(go.Scatter(x=values, y=leave, mode='lines+markers', name='Leave probability', line_shape=line_shape))
+    if calibrated is not None:
+        fig.add_trace(go.Scatter(x=values, y=calibrated, mode='lines', name='Calibrated', line_shape=line_shape,
+                                 line=dict(dash='dash')))
+    fig.add_hline(y=0.5, line_dash='dot', line_color='gray')
+    if current is not None:
+        fig.add_vline(x=current, line_dash='dot', line_color='red', annotation_text='current input')
+    fig.update_layout(
+        title=f'What-if: {label}',
+        xaxis_title=label,
+        yaxis_title='Probability of leaving',
+        yaxis_range=[0, 1],
+        height=400,
+    )
+    return fig
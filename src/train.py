@@ -0,0 +1,204 @@
+# Standard library imports
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+# Related third party imports for data manipulation
+import pandas as pd
+
+# Related third party imports for machine learning
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401, enables HalvingRandomSearchCV
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold, train_test_split
+
+# Related third party imports for model persistence
+import joblib
+
+# Local application/library specific imports
+import artifacts
+import dataset
+import model_meta
+
+
+# -------------------------------------------------------------------------------------------------------
+# * training pipeline
+# * python train.py [extract.csv ...] turns one or more HR extracts (IBM_HR_Dataset.csv by default) into
+# * the processed feature table with dataset.build_processed, searches the forest's hyperparameters with
+# * successive halving and writes a versioned artifact:
+# *   models/rf-<utc timestamp>-<model sha256[:12]>/
+# *     model.joblib        the fitted RandomForestClassifier
+# *     model.meta.json     the model_meta sidecar (test split metrics and calibration)
+# *     holdout.feather     the test split, rows the forest was not trained on
+# *     metrics.json        search results, cross-validation and test scores
+# *     schema.json         feature and target names, classes, training value ranges and the source extracts
+# * and the artifact's permutation importance tables (importance.py) before it is renamed into place
+# * bpred loads the newest artifact whose schema matches its features (artifacts.newest_artifact), or the bundled joblib
+
+# * the processed columns the model is trained on, in universal_features order
+target_column = 'Attrition_Yes'
+feature_columns = [column for column in dataset.processed_columns if column not in ('Age', target_column)]
+
+random_state = 42
+
+# * candidates start with min_resources trees and only the best 1/halving_factor of them get
+# * halving_factor times more trees in the next round, bad configs are dropped after their cheap round
+param_distributions = {
+    'max_depth': [None, 8, 12, 16, 24],
+    'min_samples_leaf': [1, 2, 4, 8],
+    'max_features': ['sqrt', 'log2', 0.5, None],
+    'criterion': ['gini', 'entropy'],
+    'class_weight': [None, 'balanced', 'balanced_subsample'],
+}
+n_candidates = int(os.environ.get('TRAIN_CANDIDATES', 27))
+min_resources = int(os.environ.get('TRAIN_MIN_TREES', 25))
+max_resources = int(os.environ.get('TRAIN_MAX_TREES', 225))
+halving_factor = 3
+cv_folds = int(os.environ.get('TRAIN_CV_FOLDS', 3))
+
+
+def load_extracts(csv_paths):
+    # * processed feature table of every extract, stacked, plus where each part came from
+    frames, sources = [], []
+    for path in csv_paths:
+        frame = dataset.build_processed(path)
+        frames.append(frame)
+        sources.append({'file': os.path.basename(path), 'sha256': dataset.sha256_file(path), 'rows': int(len(frame))})
+    return pd.concat(frames, ignore_index=True), sources
+
+
+def search_forest(x_train, y_train):
+    # * parallel successive-halving search over param_distributions, scored by ROC AUC;
+    # * the candidates run on every core (n_jobs=-1), each forest on one
+    search = HalvingRandomSearchCV(
+        RandomForestClassifier(random_state=random_state, n_jobs=1),
+        param_distributions,
+        n_candidates=n_candidates,
+        resource='n_estimators',
+        min_resources=min_resources,
+        max_resources=max_resources,
+        factor=halving_factor,
+        scoring='roc_auc',
+        cv=StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=random_state),
+        refit=False,
+        n_jobs=-1,
+        random_state=random_state,
+    )
+    search.fit(x_train, y_train)
+    return search
+
+
+def search_trace(search):
+    # * every (round, candidate) the search scored, best first
+    results = search.cv_results_
+    trace = [
+        {
+            'round': int(results['iter'][i]),
+            'n_estimators': int(results['n_resources'][i]),
+            'params': {name: results[f'param_{name}'][i] for name in param_distributions},
+            'mean_auc': float(results['mean_test_score'][i]),
+            'std_auc': float(results['std_test_score'][i]),
+        }
+        for i in range(len(results['iter']))
+    ]
+    trace.sort(key=lambda entry: (-entry['round'], -entry['mean_auc']))
+    return trace
+
+
+def feature_schema(x_train, sources, classes):
+    return {
+        'features': list(x_train.columns),
+        'target': target_column,
+        'classes': [int(label) for label in classes],
+        'dtypes': {column: str(dtype) for column, dtype in x_train.dtypes.items()},
+        'ranges': {column: [float(x_train[column].min()), float(x_train[column].max())] for column in x_train.columns},
+        'sources': sources,
+    }
+
+
+def write_json(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(content, f, indent=2, default=str)
+
+
+def write_artifact(model, metrics, schema, holdout=None, root=artifacts.artifacts_root):
+    # * writes the artifact into a temporary directory that is renamed into place, so a loader never
+    # * sees a half-written one; the directory name carries the creation time and the model's content hash
+    os.makedirs(root, exist_ok=True)
+    tmp_path = os.path.join(root, f'.rf-{os.getpid()}.tmp')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    model_path = os.path.join(tmp_path, 'model.joblib')
+    joblib.dump(model, model_path)
+    model_sha256 = model_meta.file_sha256(model_path)
+    metrics['model_sha256'] = model_sha256
+    write_json(os.path.join(tmp_path, 'metrics.json'), metrics)
+    write_json(os.path.join(tmp_path, 'schema.json'), schema)
+    if holdout is not None:
+        # the test split the forest never saw, and the same sidecar bpred would compute from it on first
+        # load (metrics and calibration on those rows), written now so the first start skips it
+        x_test, y_test = holdout
+        model_meta.save_holdout(x_test, y_test, model_path)
+        data_sha256 = model_meta.file_sha256(model_meta.holdout_path(model_path))
+        metadata = model_meta.compute_metadata(model, x_test, y_test, model_sha256, data_sha256, held_out=True)
+        model_meta.save_metadata(metadata, model_meta.metadata_path(model_path))
+
+    # the dashboard's importance tables for the new model, built once here rather than by the web
+    # workers after they reload it (importance pulls in bpred, so it is imported here)
+    import importance
+    importance.load_importance(model_path, model_sha256)
+
+    stamp = datetime.strptime(metrics['created_at'], '%Y-%m-%dT%H:%M:%S%z').strftime('%Y%m%dT%H%M%SZ')
+    path = os.path.join(root, f'rf-{stamp}-{model_sha256[:12]}')
+    os.rename(tmp_path, path)
+    return path
+
+
+def train(csv_paths, root=artifacts.artifacts_root):
+    # * the whole pipeline, returns the artifact directory
+    started = time.perf_counter()
+    df, sources = load_extracts(csv_paths)
+    x, y = df[feature_columns], df[target_column]
+    # x_test is held out from the search and the final fit, it is stored with the artifact (holdout.feather)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, train_size=0.8, random_state=random_state)
+
+    search = search_forest(x_train, y_train)
+    # best_params_ includes the tree count of the candidate's last round
+    best_params = dict(search.best_params_)
+    n_estimators = int(best_params.pop('n_estimators'))
+
+    # the final forest uses every core while fitting, then n_jobs is reset so the web workers predict on one
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=-1, **best_params)
+    model.fit(x_train, y_train)
+    model.set_params(n_jobs=None)
+
+    test_proba = model.predict_proba(x_test)[:, list(model.classes_).index(1)]
+    metrics = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'params': {**best_params, 'n_estimators': n_estimators},
+        'cv_auc': float(search.best_score_),
+        'test_auc': float(roc_auc_score(y_test, test_proba)),
+        'test_accuracy': float(accuracy_score(y_test, model.predict(x_test))),
+        'n_train': int(len(x_train)),
+        'n_test': int(len(x_test)),
+        'search': {
+            'candidates': n_candidates,
+            'rounds': int(search.n_iterations_),
+            'trees_per_round': [int(n) for n in search.n_resources_],
+            'candidates_per_round': [int(n) for n in search.n_candidates_],
+            'trace': search_trace(search),
+        },
+    }
+
+    path = write_artifact(model, metrics, feature_schema(x_train, sources, model.classes_), (x_test, y_test), root=root)
+    print(f'{path} written in {time.perf_counter() - started:.1f} s: cv AUC {metrics["cv_auc"]:.3f}, test AUC {metrics["test_auc"]:.3f}')
+    return path
+
+
+if __name__ == "__main__":
+    # * build step: python train.py [extract.csv ...], IBM_HR_Dataset.csv when no extract is given
+    train(sys.argv[1:] or [dataset.raw_csv_path])